@@ -0,0 +1,29 @@
+from .pieces import (
+    WHITE, BLACK, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    make_piece, piece_color, piece_type, square, square_row, square_col,
+    square_name, parse_square,
+)
+from .board import Board, START_FEN
+from .position import Position
+from .attackmap import AttackMapBoard
+from .moves import (
+    QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE,
+    PROMOTION, PROMOTION_CAPTURE, NULL_MOVE, MAX_MOVES,
+    new_move_buffer, encode_move, move_from, move_to, move_flag,
+    is_capture, is_promotion, promotion_type, move_to_uci,
+)
+from .movegen import (
+    CAPTURES, QUIETS, ALL_MOVES,
+    piece_moves, generate_pseudo_legal, generate_legal, generate_legal_moves,
+    generate_captures, generate_quiets, generate_evasions, legal_moves, legal_moves_from,
+    is_legal, is_valid_move, has_legal_move,
+)
+from .picker import MovePicker, staged_moves, new_picker_buffers
+from .movecache import MoveCache
+from .boards import ListBoard, MailboxBoard, BitboardBoard
+from .perft import perft, divide
+from .evaluate import evaluate
+from .tt import TranspositionTable
+from .timeman import TimeManager
+from .search import Search, search
+from .game import Game, ONGOING, CHECKMATE, STALEMATE, FIFTY_MOVES, REPETITION, game_status
@@ -0,0 +1,5 @@
+import sys
+
+from .perft import main
+
+sys.exit(main())
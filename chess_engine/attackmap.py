@@ -0,0 +1,123 @@
+# A Board that keeps each side's attacked squares and per-square attacker
+# counts up to date as pieces move, so check tests and attack-based
+# evaluation terms are lookups instead of scans.
+#
+# Every change to the position goes through put_piece and remove_piece, so
+# that is where the maps are updated: the piece's own attacks are added or
+# taken away, and only the sliders whose rays run through the changed square
+# are recomputed. unmake_move replays the same calls in reverse, so it needs
+# nothing extra. Tracking costs time on every move, which is why it lives in
+# a subclass rather than on Board itself.
+
+from .bitboard import (
+    SQUARE_BB, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks,
+)
+from .board import Board
+from .pieces import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+
+class AttackMapBoard(Board):
+    def __init__(self):
+        super().__init__()
+        # Number of each side's pieces attacking every square
+        self.attack_counts = [bytearray(64), bytearray(64)]
+        # Squares attacked at least once, per side
+        self.attacked = [0, 0]
+        # The attack set of the piece on each square, 0 where empty
+        self.piece_attacks = [0] * 64
+
+    def copy(self):
+        board = super().copy()
+        board.attack_counts = [self.attack_counts[WHITE][:], self.attack_counts[BLACK][:]]
+        board.attacked = self.attacked[:]
+        board.piece_attacks = self.piece_attacks[:]
+        return board
+
+    def put_piece(self, code, sq):
+        super().put_piece(code, sq)
+        self._update_sliders_through(sq)
+        attacks = self._attacks_from(code, sq)
+        self.piece_attacks[sq] = attacks
+        self._add_attacks(code >> 3, attacks)
+
+    def remove_piece(self, code, sq):
+        self._remove_attacks(code >> 3, self.piece_attacks[sq])
+        self.piece_attacks[sq] = 0
+        super().remove_piece(code, sq)
+        self._update_sliders_through(sq)
+
+    def _attacks_from(self, code, sq):
+        kind = code & 7
+        if kind == PAWN:
+            return PAWN_ATTACKS[code >> 3][sq]
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        if kind == KING:
+            return KING_ATTACKS[sq]
+        occ = self.occupied[0] | self.occupied[1]
+        if kind == BISHOP:
+            return bishop_attacks(sq, occ)
+        if kind == ROOK:
+            return rook_attacks(sq, occ)
+        return bishop_attacks(sq, occ) | rook_attacks(sq, occ)
+
+    def _update_sliders_through(self, sq):
+        # A square filling or emptying only changes the attacks of sliders
+        # that see it; only the squares they gain or lose are touched
+        pieces = self.pieces
+        occ = self.occupied[0] | self.occupied[1]
+        queens = pieces[QUEEN] | pieces[BLACK << 3 | QUEEN]
+        diagonal = pieces[BISHOP] | pieces[BLACK << 3 | BISHOP] | queens
+        straight = pieces[ROOK] | pieces[BLACK << 3 | ROOK] | queens
+        sliders = (bishop_attacks(sq, occ) & diagonal) | (rook_attacks(sq, occ) & straight)
+        squares = self.squares
+        piece_attacks = self.piece_attacks
+        while sliders:
+            low = sliders & -sliders
+            slider = low.bit_length() - 1
+            code = squares[slider]
+            old = piece_attacks[slider]
+            new = self._attacks_from(code, slider)
+            if new != old:
+                piece_attacks[slider] = new
+                self._remove_attacks(code >> 3, old & ~new)
+                self._add_attacks(code >> 3, new & ~old)
+            sliders ^= low
+
+    def _add_attacks(self, color, bb):
+        counts = self.attack_counts[color]
+        self.attacked[color] |= bb
+        while bb:
+            low = bb & -bb
+            counts[low.bit_length() - 1] += 1
+            bb ^= low
+
+    def _remove_attacks(self, color, bb):
+        counts = self.attack_counts[color]
+        cleared = 0
+        while bb:
+            low = bb & -bb
+            sq = low.bit_length() - 1
+            counts[sq] -= 1
+            if not counts[sq]:
+                cleared |= low
+            bb ^= low
+        self.attacked[color] ^= cleared
+
+    def attack_count(self, sq, color):
+        # How many of the side's pieces attack sq
+        return self.attack_counts[color][sq]
+
+    def attacks_by(self, color):
+        return self.attacked[color]
+
+    def is_square_attacked(self, sq, by_color, occ=None):
+        # The maps describe the real occupancy; callers asking about another
+        # one (say, with the king lifted off) get the full test
+        if occ is not None:
+            return super().is_square_attacked(sq, by_color, occ)
+        return bool(self.attacked[by_color] & SQUARE_BB[sq])
+
+    def in_check(self, color):
+        ksq = self.king_sq[color]
+        return ksq is not None and bool(self.attacked[color ^ 1] & SQUARE_BB[ksq])
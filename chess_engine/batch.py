@@ -0,0 +1,211 @@
+# Attack maps, mobility and checks for many positions at once with NumPy,
+# for bulk analysis where calling the move generator position by position
+# is too slow. Positions are an (N, 64) int8 array of the engine's piece
+# codes laid out like Board.squares (a8 = 0); stacked piece bitboards can be
+# converted with squares_from_bitboards. The leaper tables come from
+# bitboard.py and sliders use the same ray directions, so every result
+# matches what Board computes for the same position.
+#
+# NumPy is optional for the engine as a whole and needed only here.
+
+try:
+    import numpy as np
+except ImportError as exc:
+    raise ImportError("chess_engine.batch needs NumPy; install it with 'pip install numpy'") from exc
+
+from .bitboard import (
+    FULL, NOT_FILE_A, NOT_FILE_H, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+    DIRECTIONS, NORTH, WEST, NORTH_EAST, NORTH_WEST, SOUTH, EAST, SOUTH_WEST, SOUTH_EAST,
+)
+from .pieces import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+KNIGHT_TABLE = np.array(KNIGHT_ATTACKS, dtype=np.uint64)
+KING_TABLE = np.array(KING_ATTACKS, dtype=np.uint64)
+PAWN_TABLES = np.array(PAWN_ATTACKS, dtype=np.uint64)
+SQUARE_BITS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+
+def _direction(d):
+    # (square step, mask of squares a step can land on without wrapping
+    # round the board edge)
+    dr, dc = DIRECTIONS[d]
+    mask = NOT_FILE_A if dc == 1 else NOT_FILE_H if dc == -1 else FULL
+    return dr * 8 + dc, np.uint64(mask)
+
+
+BISHOP_DIRECTIONS = [_direction(d) for d in (NORTH_EAST, NORTH_WEST, SOUTH_WEST, SOUTH_EAST)]
+ROOK_DIRECTIONS = [_direction(d) for d in (NORTH, WEST, SOUTH, EAST)]
+
+# Rows a pawn of each colour starts on and the step it moves by
+PAWN_START_ROWS = (np.uint64(0xFF << 48), np.uint64(0xFF << 8))
+PAWN_STEPS = (-8, 8)
+
+CHUNK_SIZE = 8192
+
+
+def _shift(bb, step):
+    if step > 0:
+        return np.left_shift(bb, np.uint64(step))
+    return np.right_shift(bb, np.uint64(-step))
+
+
+def _slide(gen, empty, step, mask):
+    # Kogge-Stone fill: the squares reached from every bit of gen along one
+    # direction, stopping at (and including) the first occupied square
+    pro = empty & mask
+    gen = gen | (pro & _shift(gen, step))
+    pro = pro & _shift(pro, step)
+    gen = gen | (pro & _shift(gen, 2 * step))
+    pro = pro & _shift(pro, 2 * step)
+    gen = gen | (pro & _shift(gen, 4 * step))
+    return _shift(gen, step) & mask
+
+
+def popcount(bb):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bb).astype(np.int32)
+    # NumPy before 2.0: count the bits byte by byte
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.int32)
+    counts = table[np.ascontiguousarray(bb).view(np.uint8)]
+    return counts.reshape(bb.shape + (8,)).sum(axis=-1)
+
+
+def positions_from_boards(boards):
+    # (squares, sides) arrays for a sequence of Boards
+    squares = np.array([np.frombuffer(board.squares, dtype=np.int8) for board in boards], dtype=np.int8)
+    sides = np.array([board.side for board in boards], dtype=np.int8)
+    return squares.reshape(-1, 64), sides
+
+
+def piece_bitboards(squares):
+    # (N, 15) uint64 bitboards indexed by piece code, as in Board.pieces
+    squares = np.asarray(squares)
+    bitboards = np.zeros((len(squares), 15), dtype=np.uint64)
+    for code in range(1, 15):
+        bitboards[:, code] = np.bitwise_or.reduce(np.where(squares == code, SQUARE_BITS, np.uint64(0)), axis=1)
+    return bitboards
+
+
+def squares_from_bitboards(bitboards):
+    bitboards = np.asarray(bitboards, dtype=np.uint64)
+    squares = np.zeros((len(bitboards), 64), dtype=np.int8)
+    for code in range(1, 15):
+        present = (bitboards[:, code, None] & SQUARE_BITS) != 0
+        squares[present] = code
+    return squares
+
+
+def occupancy(squares):
+    # (N, 2) uint64 occupied squares per colour, and the (N,) union
+    squares = np.asarray(squares)
+    occupied = np.zeros((len(squares), 2), dtype=np.uint64)
+    zero = np.uint64(0)
+    for color in (WHITE, BLACK):
+        mine = (squares > 0) & (squares >> 3 == color)
+        occupied[:, color] = np.bitwise_or.reduce(np.where(mine, SQUARE_BITS, zero), axis=1)
+    return occupied, occupied[:, 0] | occupied[:, 1]
+
+
+def square_attacks(squares):
+    # (N, 64) uint64: the squares attacked by the piece on each square,
+    # zero where the square is empty
+    squares = np.asarray(squares)
+    kinds = squares & 7
+    colors = squares >> 3
+    _, occ = occupancy(squares)
+    empty = ~occ[:, None]
+    zero = np.uint64(0)
+
+    attacks = np.zeros(squares.shape, dtype=np.uint64)
+    attacks = np.where(kinds == KNIGHT, KNIGHT_TABLE, attacks)
+    attacks = np.where(kinds == KING, KING_TABLE, attacks)
+    attacks = np.where((kinds == PAWN) & (colors == WHITE), PAWN_TABLES[WHITE], attacks)
+    attacks = np.where((kinds == PAWN) & (colors == BLACK), PAWN_TABLES[BLACK], attacks)
+
+    # Each slider is its own fill generator, so attacks stay per square
+    diagonal = np.where((kinds == BISHOP) | (kinds == QUEEN), SQUARE_BITS, zero)
+    straight = np.where((kinds == ROOK) | (kinds == QUEEN), SQUARE_BITS, zero)
+    for step, mask in BISHOP_DIRECTIONS:
+        attacks |= _slide(diagonal, empty, step, mask)
+    for step, mask in ROOK_DIRECTIONS:
+        attacks |= _slide(straight, empty, step, mask)
+    return attacks
+
+
+def attack_maps(squares, attacks=None):
+    # (N, 2) uint64: every square attacked by each side, like Board.attacks_by
+    squares = np.asarray(squares)
+    if attacks is None:
+        attacks = square_attacks(squares)
+    maps = np.zeros((len(squares), 2), dtype=np.uint64)
+    zero = np.uint64(0)
+    for color in (WHITE, BLACK):
+        mine = (squares > 0) & (squares >> 3 == color)
+        maps[:, color] = np.bitwise_or.reduce(np.where(mine, attacks, zero), axis=1)
+    return maps
+
+
+def kings_in_check(squares, maps=None):
+    # (N, 2) bool: whether each side's king is attacked
+    squares = np.asarray(squares)
+    if maps is None:
+        maps = attack_maps(squares)
+    zero = np.uint64(0)
+    checks = np.zeros((len(squares), 2), dtype=bool)
+    for color in (WHITE, BLACK):
+        king = np.bitwise_or.reduce(np.where(squares == (color << 3 | KING), SQUARE_BITS, zero), axis=1)
+        checks[:, color] = (king & maps[:, color ^ 1]) != 0
+    return checks
+
+
+def mobility(squares, attacks=None):
+    # (N, 2) int32 pseudo-legal move counts per side: every square a piece
+    # attacks that does not hold one of its own pieces, and for pawns their
+    # pushes plus captures. Castling and en passant are left out, and a
+    # promotion counts once.
+    squares = np.asarray(squares)
+    if attacks is None:
+        attacks = square_attacks(squares)
+    occupied, occ = occupancy(squares)
+    kinds = squares & 7
+    colors = squares >> 3
+    empty = ~occ[:, None]
+    zero = np.uint64(0)
+
+    counts = np.zeros((len(squares), 2), dtype=np.int32)
+    for color in (WHITE, BLACK):
+        mine = (squares > 0) & (colors == color)
+        pieces = mine & (kinds != PAWN)
+        targets = np.where(pieces, attacks & ~occupied[:, color, None], zero)
+        total = popcount(targets).sum(axis=1)
+
+        pawns = mine & (kinds == PAWN)
+        captures = np.where(pawns, attacks & occupied[:, color ^ 1, None], zero)
+        total += popcount(captures).sum(axis=1)
+        step = PAWN_STEPS[color]
+        single = _shift(np.where(pawns, SQUARE_BITS, zero), step) & empty
+        double = _shift(single & _shift(PAWN_START_ROWS[color], step), step) & empty
+        total += popcount(single | double).sum(axis=1)
+        counts[:, color] = total
+    return counts
+
+
+def analyse(squares, sides=None, chunk_size=CHUNK_SIZE):
+    # Attack maps, mobility and checks for every position, worked through
+    # in chunks so the (N, 64) intermediates stay a bounded size. With sides
+    # given, "check" is whether the side to move is in check; otherwise it
+    # is the (N, 2) per-colour result.
+    squares = np.asarray(squares, dtype=np.int8)
+    n = len(squares)
+    maps = np.zeros((n, 2), dtype=np.uint64)
+    moves = np.zeros((n, 2), dtype=np.int32)
+    checks = np.zeros((n, 2), dtype=bool)
+    for start in range(0, n, chunk_size):
+        chunk = squares[start:start + chunk_size]
+        attacks = square_attacks(chunk)
+        maps[start:start + chunk_size] = attack_maps(chunk, attacks)
+        moves[start:start + chunk_size] = mobility(chunk, attacks)
+        checks[start:start + chunk_size] = kings_in_check(chunk, maps[start:start + chunk_size])
+    if sides is not None:
+        checks = checks[np.arange(n), np.asarray(sides, dtype=np.intp)]
+    return {"attacks": maps, "mobility": moves, "check": checks}
@@ -0,0 +1,114 @@
+# Compare board representations (boards.py) on the same workloads: perft,
+# which is all move generation and make/unmake, and a small fixed-depth
+# minimax, which adds walking the pieces to evaluate every leaf. Node
+# counts must agree between representations, so the run doubles as a check
+# that each one plays by the same rules.
+#
+#   python -m chess_engine.bench
+#   python -m chess_engine.bench --depth 4 --search-depth 3 --position kiwipete
+
+import argparse
+import time
+
+from .boards import REPRESENTATIONS
+from .moves import new_move_buffer
+from .perft import REFERENCE_POSITIONS
+from .pieces import PAWN, KNIGHT, BISHOP, ROOK, QUEEN
+
+# Material values by piece type, for the minimax leaves
+PIECE_VALUES = [0] * 7
+PIECE_VALUES[PAWN] = 100
+PIECE_VALUES[KNIGHT] = 320
+PIECE_VALUES[BISHOP] = 330
+PIECE_VALUES[ROOK] = 500
+PIECE_VALUES[QUEEN] = 900
+
+MATE_SCORE = 100000
+
+
+def perft(rep, depth, buffers):
+    buf = buffers[depth - 1]
+    count = rep.generate_moves(buf)
+    if depth == 1:
+        return count
+    nodes = 0
+    for i in range(count):
+        rep.make_move(buf[i])
+        nodes += perft(rep, depth - 1, buffers)
+        rep.unmake_move()
+    return nodes
+
+
+def evaluate(rep):
+    # Material from the side to move's point of view
+    score = 0
+    us = rep.side
+    for _, code in rep.pieces():
+        value = PIECE_VALUES[code & 7]
+        score += value if code >> 3 == us else -value
+    return score
+
+
+def minimax(rep, depth, buffers, counter):
+    # Plain negamax without pruning, so every representation visits
+    # exactly the same tree
+    counter[0] += 1
+    if depth == 0:
+        return evaluate(rep)
+    buf = buffers[depth - 1]
+    count = rep.generate_moves(buf)
+    if count == 0:
+        return -MATE_SCORE if rep.in_check() else 0
+    best = -MATE_SCORE - 1
+    for i in range(count):
+        rep.make_move(buf[i])
+        score = -minimax(rep, depth - 1, buffers, counter)
+        rep.unmake_move()
+        if score > best:
+            best = score
+    return best
+
+
+def run_workload(workload, rep, depth):
+    buffers = [new_move_buffer() for _ in range(depth)]
+    start = time.perf_counter()
+    if workload == "perft":
+        nodes = perft(rep, depth, buffers)
+    else:
+        counter = [0]
+        minimax(rep, depth, buffers, counter)
+        nodes = counter[0]
+    return nodes, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare board representations")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth (default 3)")
+    parser.add_argument("--search-depth", type=int, default=2, help="minimax depth (default 2)")
+    parser.add_argument("--position", choices=[name for name, _, _ in REFERENCE_POSITIONS],
+                        help="run a single reference position")
+    args = parser.parse_args(argv)
+
+    positions = [p for p in REFERENCE_POSITIONS if args.position in (None, p[0])]
+    mismatches = 0
+    for workload, depth in (("perft", args.depth), ("minimax", args.search_depth)):
+        totals = {}
+        for name, fen, _ in positions:
+            nodes_seen = set()
+            for cls in REPRESENTATIONS:
+                nodes, elapsed = run_workload(workload, cls.from_fen(fen), depth)
+                nodes_seen.add(nodes)
+                total_nodes, total_time = totals.get(cls.name, (0, 0.0))
+                totals[cls.name] = (total_nodes + nodes, total_time + elapsed)
+                print(f"{workload:<8} {name:<12} {cls.name:<13} depth {depth}  nodes {nodes:>9}  {elapsed:7.2f}s")
+            if len(nodes_seen) > 1:
+                print(f"{workload:<8} {name:<12} MISMATCH between representations")
+                mismatches += 1
+        for rep_name, (nodes, elapsed) in totals.items():
+            nps = nodes / elapsed if elapsed > 0 else 0
+            print(f"{workload:<8} {'total':<12} {rep_name:<13} nodes {nodes:>9}  {elapsed:7.2f}s  {nps:>10.0f} nps")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+# Bitboard primitives: one bit per square, numbered as in pieces.square(), so
+# bit 0 is a8 and bit 63 is h1. Attack tables are built once at import time;
+# sliding attacks use classical ray lookups, which keep the tables tiny and
+# are fast with Python's arbitrary precision integers.
+
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+ROW_MASKS = [0xFF << (8 * row) for row in range(8)]
+COL_MASKS = [FILE_A << col for col in range(8)]
+
+SQUARE_BB = [1 << sq for sq in range(64)]
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+# Ray directions as (row step, col step). The first four run towards lower
+# square numbers, so their nearest blocker is the most significant bit; the
+# last four run towards higher numbers and use the least significant bit.
+# Direction d + 4 is always the opposite of direction d.
+NORTH, WEST, NORTH_EAST, NORTH_WEST, SOUTH, EAST, SOUTH_WEST, SOUTH_EAST = range(8)
+DIRECTIONS = [(-1, 0), (0, -1), (-1, 1), (-1, -1), (1, 0), (0, 1), (1, -1), (1, 1)]
+
+
+def lsb(bb):
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    return bb.bit_length() - 1
+
+
+def popcount(bb):
+    return bb.bit_count()
+
+
+def iter_bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _leaper_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << (r * 8 + c)
+        table.append(bb)
+    return table
+
+
+def _ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb |= 1 << (r * 8 + c)
+            r, c = r + dr, c + dc
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _leaper_table(KING_OFFSETS)
+# Indexed by colour: white pawns capture towards row 0, black towards row 7
+PAWN_ATTACKS = [_leaper_table([(-1, -1), (-1, 1)]), _leaper_table([(1, -1), (1, 1)])]
+
+RAYS = [_ray_table(dr, dc) for dr, dc in DIRECTIONS]
+RAY_N, RAY_W, RAY_NE, RAY_NW, RAY_S, RAY_E, RAY_SW, RAY_SE = RAYS
+
+
+def rook_attacks(sq, occ):
+    attacks = 0
+
+    ray = RAY_N[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_N[blockers.bit_length() - 1] if blockers else ray
+
+    ray = RAY_W[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_W[blockers.bit_length() - 1] if blockers else ray
+
+    ray = RAY_S[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_S[(blockers & -blockers).bit_length() - 1] if blockers else ray
+
+    ray = RAY_E[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_E[(blockers & -blockers).bit_length() - 1] if blockers else ray
+
+    return attacks
+
+
+def bishop_attacks(sq, occ):
+    attacks = 0
+
+    ray = RAY_NE[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_NE[blockers.bit_length() - 1] if blockers else ray
+
+    ray = RAY_NW[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_NW[blockers.bit_length() - 1] if blockers else ray
+
+    ray = RAY_SE[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_SE[(blockers & -blockers).bit_length() - 1] if blockers else ray
+
+    ray = RAY_SW[sq]
+    blockers = ray & occ
+    attacks |= ray ^ RAY_SW[(blockers & -blockers).bit_length() - 1] if blockers else ray
+
+    return attacks
+
+
+def queen_attacks(sq, occ):
+    return rook_attacks(sq, occ) | bishop_attacks(sq, occ)
+
+
+def pawn_attacks_bb(pawns, color):
+    # Squares attacked by a whole set of pawns at once
+    if color == 0:
+        return ((pawns & NOT_FILE_A) >> 9) | ((pawns & NOT_FILE_H) >> 7)
+    return (((pawns & NOT_FILE_A) << 7) | ((pawns & NOT_FILE_H) << 9)) & FULL
+
+
+def _line_tables():
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            full_line = RAYS[d][a] | RAYS[(d + 4) % 8][a] | (1 << a)
+            row, col = divmod(a, 8)
+            r, c = row + dr, col + dc
+            gap = 0
+            while 0 <= r < 8 and 0 <= c < 8:
+                b = r * 8 + c
+                between[a][b] = gap
+                line[a][b] = full_line
+                gap |= 1 << b
+                r, c = r + dr, c + dc
+    return between, line
+
+
+# BETWEEN[a][b] holds the squares strictly between two aligned squares and
+# LINE[a][b] the whole board line through them; both are 0 when unaligned
+BETWEEN, LINE = _line_tables()
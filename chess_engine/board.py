@@ -0,0 +1,390 @@
+from .bitboard import (
+    SQUARE_BB, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, iter_bits,
+    rook_attacks, bishop_attacks, pawn_attacks_bb,
+)
+from .pieces import (
+    WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    make_piece, parse_square,
+)
+from .position import Position
+from .moves import NULL_MOVE, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE, PROMOTION
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_FILE_KEYS
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+FEN_PIECES = "pnbrqk"
+
+BACK_ROW = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+
+# Home squares used by castling, indexed by colour
+KING_HOME = [60, 4]
+ROOK_HOME_KINGSIDE = [63, 7]
+ROOK_HOME_QUEENSIDE = [56, 0]
+
+# Castling rights bits; the Zobrist castling keys are indexed by this mask
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = 15
+KINGSIDE_RIGHTS = [WHITE_KINGSIDE, BLACK_KINGSIDE]
+QUEENSIDE_RIGHTS = [WHITE_QUEENSIDE, BLACK_QUEENSIDE]
+
+# Rights kept when a move starts or ends on each square: moving a king or a
+# rook, or capturing a rook at home, gives the matching rights up
+CASTLING_MASK = [ALL_CASTLING] * 64
+for _color in (WHITE, BLACK):
+    CASTLING_MASK[KING_HOME[_color]] &= ~(KINGSIDE_RIGHTS[_color] | QUEENSIDE_RIGHTS[_color])
+    CASTLING_MASK[ROOK_HOME_KINGSIDE[_color]] &= ~KINGSIDE_RIGHTS[_color]
+    CASTLING_MASK[ROOK_HOME_QUEENSIDE[_color]] &= ~QUEENSIDE_RIGHTS[_color]
+
+
+class Board:
+    def __init__(self):
+        # One bitboard per piece code (slots 0, 7 and 8 stay empty), plus a
+        # mailbox of piece codes for constant-time lookups by square
+        self.pieces = [0] * 15
+        self.occupied = [0, 0]
+        self.squares = bytearray(64)
+        self.side = WHITE
+
+        # Castling rights as a mask of the bits above
+        self.castling = 0
+
+        # Square skipped by the last double pawn push
+        self.ep_square = None
+
+        # King squares, indexed by colour, so nothing has to search for them
+        self.king_sq = [None, None]
+
+        # Plies since the last capture or pawn move, and the move number
+        self.halfmove = 0
+        self.fullmove = 1
+
+        # One undo record per move played, popped by unmake_move
+        self.undo_stack = []
+
+        # Keys of the positions before each move played, for spotting
+        # repetitions
+        self.key_history = []
+
+        # Zobrist key, kept up to date by every change to the position
+        self.key = 0
+
+    @classmethod
+    def initial(cls):
+        board = cls()
+        for col in range(8):
+            board.put_piece(make_piece(BLACK, PAWN), 8 + col)
+            board.put_piece(make_piece(WHITE, PAWN), 48 + col)
+            board.put_piece(make_piece(BLACK, BACK_ROW[col]), col)
+            board.put_piece(make_piece(WHITE, BACK_ROW[col]), 56 + col)
+        board.castling = ALL_CASTLING
+        board.key = board.compute_key()
+        return board
+
+    @classmethod
+    def from_fen(cls, fen):
+        fields = fen.split()
+        board = cls()
+        for row, rank in enumerate(fields[0].split("/")):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                color = WHITE if char.isupper() else BLACK
+                board.put_piece(make_piece(color, FEN_PIECES.index(char.lower()) + 1), row * 8 + col)
+                col += 1
+        board.side = WHITE if fields[1] == "w" else BLACK
+        rights = fields[2] if len(fields) > 2 else "-"
+        for char, right in zip("KQkq", (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if char in rights:
+                board.castling |= right
+        if len(fields) > 3 and fields[3] != "-":
+            # As in make_move, keep the square only if a pawn can take there
+            ep_square = parse_square(fields[3])
+            if PAWN_ATTACKS[board.side ^ 1][ep_square] & board.pieces[make_piece(board.side, PAWN)]:
+                board.ep_square = ep_square
+        if len(fields) > 5:
+            board.halfmove = int(fields[4])
+            board.fullmove = int(fields[5])
+        board.key = board.compute_key()
+        return board
+
+    @classmethod
+    def from_position(cls, position):
+        board = cls()
+        for sq, code in enumerate(position.squares):
+            if code:
+                board.put_piece(code, sq)
+        board.side = position.side
+        board.castling = position.castling
+        board.ep_square = position.ep_square
+        board.halfmove = position.halfmove
+        board.fullmove = position.fullmove
+        board.key = position.key
+        return board
+
+    def snapshot(self):
+        # An immutable Position of the current state; the undo and key
+        # history stay behind
+        return Position.pack(self.squares, self.side, self.castling, self.ep_square,
+                             self.halfmove, self.fullmove, self.key)
+
+    def copy(self):
+        board = Board.__new__(type(self))
+        board.pieces = self.pieces[:]
+        board.occupied = self.occupied[:]
+        board.squares = self.squares[:]
+        board.side = self.side
+        board.castling = self.castling
+        board.ep_square = self.ep_square
+        board.king_sq = self.king_sq[:]
+        board.halfmove = self.halfmove
+        board.fullmove = self.fullmove
+        board.undo_stack = []
+        board.key_history = self.key_history[:]
+        board.key = self.key
+        return board
+
+    def compute_key(self):
+        # Full recomputation, for setting up a position and for verification
+        key = 0
+        for code in range(1, 15):
+            bb = self.pieces[code]
+            while bb:
+                low = bb & -bb
+                key ^= PIECE_KEYS[code][low.bit_length() - 1]
+                bb ^= low
+        if self.side == BLACK:
+            key ^= SIDE_KEY
+        key ^= CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+        return key
+
+    def occupancy(self):
+        return self.occupied[0] | self.occupied[1]
+
+    def put_piece(self, code, sq):
+        bit = SQUARE_BB[sq]
+        self.pieces[code] |= bit
+        self.occupied[code >> 3] |= bit
+        self.squares[sq] = code
+        self.key ^= PIECE_KEYS[code][sq]
+        # Every king move, castling included, lands through here
+        if code & 7 == KING:
+            self.king_sq[code >> 3] = sq
+
+    def remove_piece(self, code, sq):
+        bit = SQUARE_BB[sq]
+        self.pieces[code] ^= bit
+        self.occupied[code >> 3] ^= bit
+        self.squares[sq] = 0
+        self.key ^= PIECE_KEYS[code][sq]
+
+    def piece_at(self, sq):
+        return self.squares[sq]
+
+    def king_square(self, color):
+        return self.king_sq[color]
+
+    def attacks_by(self, color):
+        # Every square attacked by the given side
+        pieces = self.pieces
+        occ = self.occupied[0] | self.occupied[1]
+        base = color << 3
+
+        attacks = pawn_attacks_bb(pieces[base | PAWN], color)
+        for sq in iter_bits(pieces[base | KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(pieces[base | BISHOP] | pieces[base | QUEEN]):
+            attacks |= bishop_attacks(sq, occ)
+        for sq in iter_bits(pieces[base | ROOK] | pieces[base | QUEEN]):
+            attacks |= rook_attacks(sq, occ)
+        for sq in iter_bits(pieces[base | KING]):
+            attacks |= KING_ATTACKS[sq]
+        return attacks
+
+    def is_square_attacked(self, sq, by_color, occ=None):
+        # Look outward from sq for each kind of attacker and stop at the first
+        pieces = self.pieces
+        base = by_color << 3
+        if KNIGHT_ATTACKS[sq] & pieces[base | KNIGHT]:
+            return True
+        # A pawn attacks sq if a pawn of the other colour on sq would attack it
+        if PAWN_ATTACKS[by_color ^ 1][sq] & pieces[base | PAWN]:
+            return True
+        if KING_ATTACKS[sq] & pieces[base | KING]:
+            return True
+        if occ is None:
+            occ = self.occupied[0] | self.occupied[1]
+        queens = pieces[base | QUEEN]
+        diagonal = pieces[base | BISHOP] | queens
+        if diagonal and bishop_attacks(sq, occ) & diagonal:
+            return True
+        straight = pieces[base | ROOK] | queens
+        if straight and rook_attacks(sq, occ) & straight:
+            return True
+        return False
+
+    def attackers_to(self, sq, by_color, occ):
+        # Bitboard of the given side's pieces attacking sq through occ
+        pieces = self.pieces
+        base = by_color << 3
+        queens = pieces[base | QUEEN]
+        return ((KNIGHT_ATTACKS[sq] & pieces[base | KNIGHT])
+                | (PAWN_ATTACKS[by_color ^ 1][sq] & pieces[base | PAWN])
+                | (KING_ATTACKS[sq] & pieces[base | KING])
+                | (bishop_attacks(sq, occ) & (pieces[base | BISHOP] | queens))
+                | (rook_attacks(sq, occ) & (pieces[base | ROOK] | queens)))
+
+    def in_check(self, color):
+        ksq = self.king_sq[color]
+        return ksq is not None and self.is_square_attacked(ksq, color ^ 1)
+
+    def repetition_count(self):
+        # How often the current position has occurred before. Only positions
+        # since the last capture or pawn move can repeat, and only every
+        # other one has the same side to move.
+        key = self.key
+        history = self.key_history
+        stop = max(len(history) - self.halfmove, 0)
+        count = 0
+        for i in range(len(history) - 2, stop - 1, -2):
+            if history[i] == key:
+                count += 1
+        return count
+
+    def is_repetition(self, times=1):
+        return self.repetition_count() >= times
+
+    def make_move(self, move):
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 12
+        squares = self.squares
+        code = squares[frm]
+        color = code >> 3
+        captured = squares[to] if flag & CAPTURE and flag != EP_CAPTURE else 0
+
+        # Everything make_move overwrites that the move itself can't recover
+        self.undo_stack.append((move, code, captured, self.castling, self.ep_square, self.halfmove))
+        self.key_history.append(self.key)
+
+        # Piece keys change through put_piece/remove_piece; the castling and
+        # en passant keys are swapped out here and back in once updated
+        key = self.key ^ CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+        self.key = key
+
+        if captured:
+            self.remove_piece(captured, to)
+        elif flag == EP_CAPTURE:
+            # En passant removes the pawn beside the capturing pawn
+            self.remove_piece(make_piece(color ^ 1, PAWN), to + (8 if color == WHITE else -8))
+
+        self.remove_piece(code, frm)
+        if flag & PROMOTION:
+            self.put_piece(make_piece(color, (flag & 3) + KNIGHT), to)
+        else:
+            self.put_piece(code, to)
+
+        self.ep_square = None
+        if flag == DOUBLE_PUSH:
+            # Only record an en passant square that can actually be used, so
+            # positions that differ in nothing else share a key
+            middle = (frm + to) >> 1
+            if PAWN_ATTACKS[color][middle] & self.pieces[make_piece(color ^ 1, PAWN)]:
+                self.ep_square = middle
+        elif flag == KING_CASTLE:
+            rook = make_piece(color, ROOK)
+            self.remove_piece(rook, frm + 3)
+            self.put_piece(rook, frm + 1)
+        elif flag == QUEEN_CASTLE:
+            rook = make_piece(color, ROOK)
+            self.remove_piece(rook, frm - 4)
+            self.put_piece(rook, frm - 1)
+
+        self.castling &= CASTLING_MASK[frm] & CASTLING_MASK[to]
+
+        if code & 7 == PAWN or flag & CAPTURE:
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        if color == BLACK:
+            self.fullmove += 1
+        self.side ^= 1
+
+        key = self.key ^ SIDE_KEY ^ CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+        self.key = key
+
+    def make_null_move(self):
+        # Pass the turn without moving, e.g. to look at the other side's moves
+        self.undo_stack.append((NULL_MOVE, 0, 0, self.castling, self.ep_square, self.halfmove))
+        self.key_history.append(self.key)
+        key = self.key ^ SIDE_KEY
+        if self.ep_square is not None:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+            self.ep_square = None
+        self.key = key
+        self.halfmove += 1
+        self.side ^= 1
+
+    def unmake_null_move(self):
+        ep_square, halfmove = self.undo_stack.pop()[4:]
+        self.key_history.pop()
+        key = self.key ^ SIDE_KEY
+        if ep_square is not None:
+            key ^= EP_FILE_KEYS[ep_square & 7]
+        self.key = key
+        self.ep_square = ep_square
+        self.halfmove = halfmove
+        self.side ^= 1
+
+    def unmake_move(self):
+        move, code, captured, castling, ep_square, halfmove = self.undo_stack.pop()
+        self.key_history.pop()
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 12
+        color = code >> 3
+
+        # Swap the castling and en passant keys back along with their state
+        key = self.key ^ SIDE_KEY ^ CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+
+        self.side = color
+        if color == BLACK:
+            self.fullmove -= 1
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove = halfmove
+
+        key ^= CASTLING_KEYS[self.castling]
+        if ep_square is not None:
+            key ^= EP_FILE_KEYS[ep_square & 7]
+        self.key = key
+
+        if flag & PROMOTION:
+            self.remove_piece(make_piece(color, (flag & 3) + KNIGHT), to)
+        else:
+            self.remove_piece(code, to)
+        self.put_piece(code, frm)
+
+        if captured:
+            self.put_piece(captured, to)
+        elif flag == EP_CAPTURE:
+            self.put_piece(make_piece(color ^ 1, PAWN), to + (8 if color == WHITE else -8))
+        elif flag == KING_CASTLE:
+            rook = make_piece(color, ROOK)
+            self.remove_piece(rook, frm + 1)
+            self.put_piece(rook, frm + 3)
+        elif flag == QUEEN_CASTLE:
+            rook = make_piece(color, ROOK)
+            self.remove_piece(rook, frm - 1)
+            self.put_piece(rook, frm - 4)
@@ -0,0 +1,471 @@
+# Interchangeable board representations behind one small interface, so the
+# cost of a representation can be measured on real workloads instead of
+# guessed at (see bench.py). Every representation talks in 0..63 squares
+# (a8 = 0), the engine's piece codes and its packed moves; how it stores the
+# squares and walks them is its own business.
+#
+# The interface:
+#   from_fen(fen)            classmethod building the position
+#   piece_at(sq)             piece code on a square, EMPTY if none
+#   set_piece(sq, code)      put a piece on a square, replacing any there
+#   clear(sq)                empty a square
+#   pieces()                 iterate (square, code) over occupied squares
+#   generate_moves(buf)      legal moves for the side to move; returns count
+#   make_move(move) / unmake_move()
+#   in_check()               whether the side to move is in check
+#   side                     colour to move
+
+from .board import (
+    Board, KING_HOME, CASTLING_MASK, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+)
+from .movegen import PROMOTION_FLAGS, generate_legal
+from .moves import (
+    QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE, PROMOTION,
+)
+from .pieces import WHITE, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, make_piece
+
+
+class MailboxRules:
+    # Rules shared by the square-array representations: loading a position,
+    # making and unmaking moves through set_piece/clear, castling, and
+    # legality by trial move. A subclass stores the squares and supplies
+    # piece_at, set_piece, clear, pieces, generate_pseudo_legal and
+    # is_attacked.
+    name = None
+
+    def __init__(self):
+        self.side = WHITE
+        self.castling = 0
+        self.ep_square = None
+        self.king_sq = [None, None]
+        self.undo_stack = []
+
+    @classmethod
+    def from_fen(cls, fen):
+        board = Board.from_fen(fen)
+        rep = cls()
+        for sq, code in enumerate(board.squares):
+            if code:
+                rep.set_piece(sq, code)
+                if code & 7 == KING:
+                    rep.king_sq[code >> 3] = sq
+        rep.side = board.side
+        rep.castling = board.castling
+        rep.ep_square = board.ep_square
+        return rep
+
+    def in_check(self):
+        return self.is_attacked(self.king_sq[self.side], self.side ^ 1)
+
+    def generate_moves(self, buf):
+        # Pseudo-legal moves filtered in place by playing each one and
+        # checking the mover's king
+        us = self.side
+        them = us ^ 1
+        n = self.generate_pseudo_legal(buf)
+        n = self._add_castling(buf, n, us, them)
+        king_sq = self.king_sq
+        legal = 0
+        for i in range(n):
+            move = buf[i]
+            self.make_move(move)
+            if not self.is_attacked(king_sq[us], them):
+                buf[legal] = move
+                legal += 1
+            self.unmake_move()
+        return legal
+
+    def _add_castling(self, buf, n, us, them):
+        # Out of and through check are refused here; into check is caught by
+        # the trial move like any other king move
+        ksq = KING_HOME[us]
+        if us == WHITE:
+            kingside, queenside = WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            kingside, queenside = BLACK_KINGSIDE, BLACK_QUEENSIDE
+        if not self.castling & (kingside | queenside) or self.is_attacked(ksq, them):
+            return n
+        piece_at = self.piece_at
+        if (self.castling & kingside and not piece_at(ksq + 1) and not piece_at(ksq + 2)
+                and not self.is_attacked(ksq + 1, them)):
+            buf[n] = ksq | (ksq + 2) << 6 | KING_CASTLE << 12
+            n += 1
+        if (self.castling & queenside and not piece_at(ksq - 1) and not piece_at(ksq - 2)
+                and not piece_at(ksq - 3) and not self.is_attacked(ksq - 1, them)):
+            buf[n] = ksq | (ksq - 2) << 6 | QUEEN_CASTLE << 12
+            n += 1
+        return n
+
+    def make_move(self, move):
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 12
+        code = self.piece_at(frm)
+        color = code >> 3
+        self.undo_stack.append((move, code, self.piece_at(to), self.castling, self.ep_square))
+
+        self.clear(frm)
+        if flag & PROMOTION:
+            self.set_piece(to, make_piece(color, (flag & 3) + KNIGHT))
+        else:
+            self.set_piece(to, code)
+
+        self.ep_square = None
+        if flag == DOUBLE_PUSH:
+            self.ep_square = (frm + to) >> 1
+        elif flag == EP_CAPTURE:
+            self.clear(to + (8 if color == WHITE else -8))
+        elif flag == KING_CASTLE:
+            self.clear(frm + 3)
+            self.set_piece(frm + 1, make_piece(color, ROOK))
+        elif flag == QUEEN_CASTLE:
+            self.clear(frm - 4)
+            self.set_piece(frm - 1, make_piece(color, ROOK))
+
+        if code & 7 == KING:
+            self.king_sq[color] = to
+        self.castling &= CASTLING_MASK[frm] & CASTLING_MASK[to]
+        self.side ^= 1
+
+    def unmake_move(self):
+        move, code, captured, self.castling, self.ep_square = self.undo_stack.pop()
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 12
+        color = code >> 3
+        self.side = color
+
+        self.set_piece(frm, code)
+        if captured:
+            self.set_piece(to, captured)
+        else:
+            self.clear(to)
+        if flag == EP_CAPTURE:
+            self.set_piece(to + (8 if color == WHITE else -8), make_piece(color ^ 1, PAWN))
+        elif flag == KING_CASTLE:
+            self.clear(frm + 1)
+            self.set_piece(frm + 3, make_piece(color, ROOK))
+        elif flag == QUEEN_CASTLE:
+            self.clear(frm - 1)
+            self.set_piece(frm - 4, make_piece(color, ROOK))
+
+        if code & 7 == KING:
+            self.king_sq[color] = frm
+
+
+# 8x8 list of lists, indexed [row][col] like the original game board.
+# Every step off a square needs a bounds check on both coordinates.
+
+KNIGHT_STEPS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_STEPS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ROOK_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_STEPS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+class ListBoard(MailboxRules):
+    name = "list8x8"
+
+    def __init__(self):
+        super().__init__()
+        self.grid = [[EMPTY] * 8 for _ in range(8)]
+
+    def piece_at(self, sq):
+        return self.grid[sq >> 3][sq & 7]
+
+    def set_piece(self, sq, code):
+        self.grid[sq >> 3][sq & 7] = code
+
+    def clear(self, sq):
+        self.grid[sq >> 3][sq & 7] = EMPTY
+
+    def pieces(self):
+        for row, cells in enumerate(self.grid):
+            for col, code in enumerate(cells):
+                if code:
+                    yield row * 8 + col, code
+
+    def generate_pseudo_legal(self, buf):
+        n = 0
+        us = self.side
+        grid = self.grid
+        for row in range(8):
+            cells = grid[row]
+            for col in range(8):
+                code = cells[col]
+                if not code or code >> 3 != us:
+                    continue
+                kind = code & 7
+                frm = row * 8 + col
+                if kind == PAWN:
+                    n = self._pawn_moves(buf, n, frm, row, col, us)
+                    continue
+                if kind == KNIGHT:
+                    steps, slide = KNIGHT_STEPS, False
+                elif kind == KING:
+                    steps, slide = KING_STEPS, False
+                elif kind == BISHOP:
+                    steps, slide = BISHOP_STEPS, True
+                elif kind == ROOK:
+                    steps, slide = ROOK_STEPS, True
+                else:
+                    steps, slide = KING_STEPS, True
+                for dr, dc in steps:
+                    r, c = row + dr, col + dc
+                    while 0 <= r < 8 and 0 <= c < 8:
+                        target = grid[r][c]
+                        if target:
+                            if target >> 3 != us:
+                                buf[n] = frm | (r * 8 + c) << 6 | CAPTURE << 12
+                                n += 1
+                            break
+                        buf[n] = frm | (r * 8 + c) << 6
+                        n += 1
+                        if not slide:
+                            break
+                        r += dr
+                        c += dc
+        return n
+
+    def _pawn_moves(self, buf, n, frm, row, col, us):
+        grid = self.grid
+        dr = -1 if us == WHITE else 1
+        r = row + dr
+        last = r == 0 or r == 7
+        if not grid[r][col]:
+            n = _add_pawn_move(buf, n, frm, r * 8 + col, QUIET, last)
+            if row == (6 if us == WHITE else 1) and not grid[r + dr][col]:
+                buf[n] = frm | ((r + dr) * 8 + col) << 6 | DOUBLE_PUSH << 12
+                n += 1
+        for c in (col - 1, col + 1):
+            if 0 <= c < 8:
+                target = grid[r][c]
+                to = r * 8 + c
+                if target and target >> 3 != us:
+                    n = _add_pawn_move(buf, n, frm, to, CAPTURE, last)
+                elif to == self.ep_square:
+                    buf[n] = frm | to << 6 | EP_CAPTURE << 12
+                    n += 1
+        return n
+
+    def is_attacked(self, sq, by_color):
+        grid = self.grid
+        row, col = sq >> 3, sq & 7
+        base = by_color << 3
+        knight, king = base | KNIGHT, base | KING
+        for dr, dc in KNIGHT_STEPS:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8 and grid[r][c] == knight:
+                return True
+        for dr, dc in KING_STEPS:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8 and grid[r][c] == king:
+                return True
+        # An attacking pawn sits one row behind the square from its own side
+        r = row + (1 if by_color == WHITE else -1)
+        if 0 <= r < 8:
+            pawn = base | PAWN
+            if col > 0 and grid[r][col - 1] == pawn or col < 7 and grid[r][col + 1] == pawn:
+                return True
+        for steps, slider in ((ROOK_STEPS, base | ROOK), (BISHOP_STEPS, base | BISHOP)):
+            queen = base | QUEEN
+            for dr, dc in steps:
+                r, c = row + dr, col + dc
+                while 0 <= r < 8 and 0 <= c < 8:
+                    target = grid[r][c]
+                    if target:
+                        if target == slider or target == queen:
+                            return True
+                        break
+                    r += dr
+                    c += dc
+        return False
+
+
+# 10x12 mailbox in one bytearray: the 8x8 board sits inside a border two
+# cells deep, so a knight or slider stepping off the board lands on a
+# sentinel instead of needing bounds checks.
+
+OFFBOARD = 0xFF
+TO_120 = [21 + (sq >> 3) * 10 + (sq & 7) for sq in range(64)]
+TO_64 = [-1] * 120
+for _sq, _i in enumerate(TO_120):
+    TO_64[_i] = _sq
+
+KNIGHT_OFFSETS = (-21, -19, -12, -8, 8, 12, 19, 21)
+KING_OFFSETS = (-11, -10, -9, -1, 1, 9, 10, 11)
+ROOK_OFFSETS = (-10, 10, -1, 1)
+BISHOP_OFFSETS = (-11, -9, 9, 11)
+
+# (offsets, slides) by piece type, pawns aside
+PIECE_OFFSETS = {
+    KNIGHT: (KNIGHT_OFFSETS, False),
+    BISHOP: (BISHOP_OFFSETS, True),
+    ROOK: (ROOK_OFFSETS, True),
+    QUEEN: (KING_OFFSETS, True),
+    KING: (KING_OFFSETS, False),
+}
+
+
+class MailboxBoard(MailboxRules):
+    name = "mailbox10x12"
+
+    def __init__(self):
+        super().__init__()
+        self.cells = bytearray([OFFBOARD]) * 120
+        for i in TO_120:
+            self.cells[i] = EMPTY
+
+    def piece_at(self, sq):
+        return self.cells[TO_120[sq]]
+
+    def set_piece(self, sq, code):
+        self.cells[TO_120[sq]] = code
+
+    def clear(self, sq):
+        self.cells[TO_120[sq]] = EMPTY
+
+    def pieces(self):
+        cells = self.cells
+        for sq, i in enumerate(TO_120):
+            if cells[i]:
+                yield sq, cells[i]
+
+    def generate_pseudo_legal(self, buf):
+        n = 0
+        us = self.side
+        cells = self.cells
+        for frm, i in enumerate(TO_120):
+            code = cells[i]
+            if not code or code >> 3 != us:
+                continue
+            kind = code & 7
+            if kind == PAWN:
+                n = self._pawn_moves(buf, n, frm, i, us)
+                continue
+            offsets, slide = PIECE_OFFSETS[kind]
+            for d in offsets:
+                j = i + d
+                target = cells[j]
+                while target != OFFBOARD:
+                    if target:
+                        if target >> 3 != us:
+                            buf[n] = frm | TO_64[j] << 6 | CAPTURE << 12
+                            n += 1
+                        break
+                    buf[n] = frm | TO_64[j] << 6
+                    n += 1
+                    if not slide:
+                        break
+                    j += d
+                    target = cells[j]
+        return n
+
+    def _pawn_moves(self, buf, n, frm, i, us):
+        cells = self.cells
+        d = -10 if us == WHITE else 10
+        j = i + d
+        to = TO_64[j]
+        last = to < 8 or to >= 56
+        if not cells[j]:
+            n = _add_pawn_move(buf, n, frm, to, QUIET, last)
+            if frm >> 3 == (6 if us == WHITE else 1) and not cells[j + d]:
+                buf[n] = frm | TO_64[j + d] << 6 | DOUBLE_PUSH << 12
+                n += 1
+        for k in (j - 1, j + 1):
+            target = cells[k]
+            if target == OFFBOARD:
+                continue
+            if target and target >> 3 != us:
+                n = _add_pawn_move(buf, n, frm, TO_64[k], CAPTURE, last)
+            elif TO_64[k] == self.ep_square:
+                buf[n] = frm | TO_64[k] << 6 | EP_CAPTURE << 12
+                n += 1
+        return n
+
+    def is_attacked(self, sq, by_color):
+        cells = self.cells
+        i = TO_120[sq]
+        base = by_color << 3
+        knight, king = base | KNIGHT, base | KING
+        for d in KNIGHT_OFFSETS:
+            if cells[i + d] == knight:
+                return True
+        for d in KING_OFFSETS:
+            if cells[i + d] == king:
+                return True
+        pawn = base | PAWN
+        back = 10 if by_color == WHITE else -10
+        if cells[i + back - 1] == pawn or cells[i + back + 1] == pawn:
+            return True
+        queen = base | QUEEN
+        for offsets, slider in ((ROOK_OFFSETS, base | ROOK), (BISHOP_OFFSETS, base | BISHOP)):
+            for d in offsets:
+                j = i + d
+                target = cells[j]
+                while not target:
+                    j += d
+                    target = cells[j]
+                if target == slider or target == queen:
+                    return True
+        return False
+
+
+def _add_pawn_move(buf, n, frm, to, flag, promotes):
+    if promotes:
+        for promotion in PROMOTION_FLAGS:
+            buf[n] = frm | to << 6 | (promotion | flag) << 12
+            n += 1
+    else:
+        buf[n] = frm | to << 6 | flag << 12
+        n += 1
+    return n
+
+
+class BitboardBoard:
+    # The engine's own Board behind the same interface, for comparison
+    name = "bitboard"
+
+    def __init__(self, board=None):
+        self.board = board if board is not None else Board()
+
+    @classmethod
+    def from_fen(cls, fen):
+        return cls(Board.from_fen(fen))
+
+    @property
+    def side(self):
+        return self.board.side
+
+    def piece_at(self, sq):
+        return self.board.squares[sq]
+
+    def set_piece(self, sq, code):
+        self.clear(sq)
+        self.board.put_piece(code, sq)
+
+    def clear(self, sq):
+        code = self.board.squares[sq]
+        if code:
+            self.board.remove_piece(code, sq)
+
+    def pieces(self):
+        for code, bb in enumerate(self.board.pieces):
+            while bb:
+                low = bb & -bb
+                yield low.bit_length() - 1, code
+                bb ^= low
+
+    def generate_moves(self, buf):
+        return generate_legal(self.board, buf)
+
+    def make_move(self, move):
+        self.board.make_move(move)
+
+    def unmake_move(self):
+        self.board.unmake_move()
+
+    def in_check(self):
+        return self.board.in_check(self.board.side)
+
+
+REPRESENTATIONS = [BitboardBoard, ListBoard, MailboxBoard]
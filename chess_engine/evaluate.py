@@ -0,0 +1,156 @@
+# Static evaluation: material plus piece-square tables, in centipawns from
+# the side to move's point of view. The tables are the well-known
+# "simplified evaluation function" ones, written from White's side with a8
+# first, which is also our square order; Black reads them mirrored. Each
+# piece's value and square bonus are folded into one table per piece code,
+# so a position is scored by summing table entries over the bitboards.
+
+from .pieces import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, make_piece
+
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+
+MATE_SCORE = 30000
+# Scores beyond this are mates, counted in plies from the root
+MATE_BOUND = MATE_SCORE - 1000
+DRAW_SCORE = 0
+
+PAWN_TABLE = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+]
+
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+
+ROOK_TABLE = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0,
+]
+
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+
+# The king hides behind its pawns while queens are on, and heads for the
+# centre once they are gone
+KING_MIDDLEGAME_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+]
+
+KING_ENDGAME_TABLE = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+
+
+def _piece_tables(king_table):
+    # Value plus square bonus, indexed by piece code then square
+    tables = [[0] * 64 for _ in range(15)]
+    for kind, table in ((PAWN, PAWN_TABLE), (KNIGHT, KNIGHT_TABLE), (BISHOP, BISHOP_TABLE),
+                        (ROOK, ROOK_TABLE), (QUEEN, QUEEN_TABLE), (KING, king_table)):
+        for sq in range(64):
+            tables[make_piece(WHITE, kind)][sq] = PIECE_VALUES[kind] + table[sq]
+            tables[make_piece(BLACK, kind)][sq] = PIECE_VALUES[kind] + table[sq ^ 56]
+    return tables
+
+
+MIDDLEGAME_TABLES = _piece_tables(KING_MIDDLEGAME_TABLE)
+ENDGAME_TABLES = _piece_tables(KING_ENDGAME_TABLE)
+
+# Codes summed for each side; kings are scored separately by game phase
+_WHITE_CODES = [make_piece(WHITE, kind) for kind in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN)]
+_BLACK_CODES = [make_piece(BLACK, kind) for kind in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN)]
+_WHITE_QUEEN = make_piece(WHITE, QUEEN)
+_BLACK_QUEEN = make_piece(BLACK, QUEEN)
+
+
+def is_endgame(board):
+    # No queens left, or no more than a minor piece beside each queen
+    pieces = board.pieces
+    for color, queen in ((WHITE, _WHITE_QUEEN), (BLACK, _BLACK_QUEEN)):
+        if pieces[queen]:
+            base = color << 3
+            rooks = pieces[base | ROOK]
+            minors = (pieces[base | KNIGHT] | pieces[base | BISHOP]).bit_count()
+            if rooks or minors > 1:
+                return False
+    return True
+
+
+def evaluate(board):
+    tables = MIDDLEGAME_TABLES
+    pieces = board.pieces
+    score = 0
+    for code in _WHITE_CODES:
+        table = tables[code]
+        bb = pieces[code]
+        while bb:
+            low = bb & -bb
+            score += table[low.bit_length() - 1]
+            bb ^= low
+    for code in _BLACK_CODES:
+        table = tables[code]
+        bb = pieces[code]
+        while bb:
+            low = bb & -bb
+            score -= table[low.bit_length() - 1]
+            bb ^= low
+
+    king_tables = ENDGAME_TABLES if is_endgame(board) else MIDDLEGAME_TABLES
+    king_sq = board.king_sq
+    if king_sq[WHITE] is not None:
+        score += king_tables[make_piece(WHITE, KING)][king_sq[WHITE]]
+    if king_sq[BLACK] is not None:
+        score -= king_tables[make_piece(BLACK, KING)][king_sq[BLACK]]
+    return score if board.side == WHITE else -score
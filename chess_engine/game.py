@@ -0,0 +1,105 @@
+# Headless game state: the rules and the computer player without any
+# display. The pygame UI in chess_game.py drives one of these, and tests,
+# worker processes or servers can use it directly.
+
+from .board import Board
+from .movecache import MoveCache
+from .movegen import generate_legal_moves, has_legal_move
+from .moves import is_promotion, promotion_type, new_move_buffer
+from .pieces import QUEEN
+from .search import Search
+from .tt import TranspositionTable, DEFAULT_SIZE_MB
+
+# Game results, as returned by game_status
+ONGOING = 0
+CHECKMATE = 1
+STALEMATE = 2
+FIFTY_MOVES = 3
+REPETITION = 4
+
+
+def game_status(board):
+    # Whether the game is over and why. Mate on the hundredth half-move
+    # still counts as mate, so the legal-move test comes first; it stops at
+    # the first move found, so it is cheap while play goes on.
+    if not has_legal_move(board):
+        return CHECKMATE if board.in_check(board.side) else STALEMATE
+    if board.halfmove >= 100:
+        return FIFTY_MOVES
+    if board.repetition_count() >= 2:
+        return REPETITION
+    return ONGOING
+
+
+class Game:
+    def __init__(self, board=None, tt_size_mb=DEFAULT_SIZE_MB):
+        # Legal moves of recent positions by source square, and the search's
+        # transposition table; both are keyed by position, so they stay
+        # valid across new games. One Search plays every computer move, so
+        # its killers, history and countermoves carry over too.
+        self.move_cache = MoveCache()
+        self.tt = TranspositionTable(tt_size_mb)
+        self.search = Search(tt=self.tt)
+        self.new_game(board)
+
+    def new_game(self, board=None):
+        self.board = board if board is not None else Board.initial()
+        # Packed moves played so far
+        self.moves = []
+        # Scratch buffer for the move generator
+        self.move_buffer = new_move_buffer()
+
+    @property
+    def side_to_move(self):
+        return self.board.side
+
+    def generate_legal_moves(self, color=None):
+        # All legal moves for a side (the side to move by default) as one
+        # packed array
+        buf = self.move_buffer
+        return buf[:generate_legal_moves(self.board, buf, color)]
+
+    def legal_moves(self):
+        return self.generate_legal_moves().tolist()
+
+    def legal_moves_from(self, sq):
+        return self.move_cache.moves_from(self.board, sq)
+
+    def find_move(self, frm, to, promotion=QUEEN):
+        # The legal packed move between two squares, or None
+        for move in self.move_cache.moves_from(self.board, frm):
+            if (move >> 6) & 63 == to:
+                if not is_promotion(move) or promotion_type(move) == promotion:
+                    return move
+        return None
+
+    def make_move(self, move):
+        self.board.make_move(move)
+        self.moves.append(move)
+
+    def unmake_move(self):
+        self.board.unmake_move()
+        return self.moves.pop()
+
+    def status(self):
+        return game_status(self.board)
+
+    def is_game_over(self):
+        return self.status() != ONGOING
+
+    def winner(self):
+        # The winning colour after checkmate, otherwise None
+        if self.status() == CHECKMATE:
+            return self.board.side ^ 1
+        return None
+
+    def in_check(self, color=None):
+        return self.board.in_check(self.board.side if color is None else color)
+
+    def choose_move(self, difficulty=2, stop=None):
+        # The computer's move at a difficulty from 1 to 3, or None when the
+        # side to move has no legal move. Setting the stop event ends the
+        # search early with the best move found so far.
+        self.search.set_difficulty(difficulty)
+        move = self.search.run(self.board, stop)
+        return move or None
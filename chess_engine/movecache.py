@@ -0,0 +1,44 @@
+# Legal moves per position, grouped by the square they move from. The UI
+# asks for one piece's moves on every click and every redraw; with this the
+# whole side's moves are generated once per position and each later lookup
+# is a dictionary access. A few recent positions are kept, so taking a move
+# back costs nothing either.
+
+from collections import OrderedDict
+
+from .movegen import generate_legal
+from .moves import new_move_buffer
+
+
+class MoveCache:
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.buffer = new_move_buffer()
+
+    def clear(self):
+        self.entries.clear()
+
+    def moves_by_square(self, board):
+        # {from square: tuple of packed moves} for the side to move, looked
+        # up by Zobrist key and generated on a miss
+        key = board.key
+        entries = self.entries
+        by_square = entries.get(key)
+        if by_square is not None:
+            entries.move_to_end(key)
+            return by_square
+
+        buf = self.buffer
+        grouped = {}
+        for move in buf[:generate_legal(board, buf)]:
+            grouped.setdefault(move & 63, []).append(move)
+        by_square = {sq: tuple(moves) for sq, moves in grouped.items()}
+
+        entries[key] = by_square
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+        return by_square
+
+    def moves_from(self, board, sq):
+        return self.moves_by_square(board).get(sq, ())
@@ -0,0 +1,480 @@
+from .bitboard import (
+    FULL, ROW_MASKS, SQUARE_BB, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE,
+    rook_attacks, bishop_attacks, queen_attacks,
+)
+from .board import KING_HOME, KINGSIDE_RIGHTS, QUEENSIDE_RIGHTS
+from .moves import (
+    QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE, PROMOTION,
+    encode_move, new_move_buffer,
+)
+from .pieces import WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, make_piece
+
+# Promotion flags for queen, rook, bishop and knight, in generation order
+PROMOTION_FLAGS = (PROMOTION | 3, PROMOTION | 2, PROMOTION | 1, PROMOTION)
+PROMOTION_RANKS = ROW_MASKS[0] | ROW_MASKS[7]
+
+# Move kinds for generate_legal. Promotions count as captures because they
+# change the material balance and belong in the same search stage.
+CAPTURES = 1
+QUIETS = 2
+ALL_MOVES = CAPTURES | QUIETS
+
+
+def _add_targets(buf, n, frm, targets, enemy):
+    while targets:
+        low = targets & -targets
+        if low & enemy:
+            buf[n] = frm | ((low.bit_length() - 1) << 6) | (CAPTURE << 12)
+        else:
+            buf[n] = frm | ((low.bit_length() - 1) << 6)
+        n += 1
+        targets ^= low
+    return n
+
+
+def _add_pawn_move(buf, n, frm, to, capture):
+    if to < 8 or to >= 56:
+        base = frm | (to << 6)
+        for flag in PROMOTION_FLAGS:
+            buf[n] = base | ((flag | capture) << 12)
+            n += 1
+    else:
+        buf[n] = frm | (to << 6) | (capture << 12)
+        n += 1
+    return n
+
+
+def piece_moves(board, sq, buf, n=0):
+    # Pseudo-legal moves for the piece on sq, written into buf from index n;
+    # returns the new move count
+    code = board.squares[sq]
+    if not code:
+        return n
+    color = code >> 3
+    kind = code & 7
+    own = board.occupied[color]
+    enemy = board.occupied[color ^ 1]
+    occ = own | enemy
+
+    if kind == PAWN:
+        step = -8 if color == WHITE else 8
+        to = sq + step
+        if not occ & SQUARE_BB[to]:
+            n = _add_pawn_move(buf, n, sq, to, QUIET)
+            # Double move from the starting row
+            start_row = 6 if color == WHITE else 1
+            if sq >> 3 == start_row and not occ & SQUARE_BB[to + step]:
+                buf[n] = encode_move(sq, to + step, DOUBLE_PUSH)
+                n += 1
+        attacks = PAWN_ATTACKS[color][sq]
+        captures = attacks & enemy
+        while captures:
+            low = captures & -captures
+            n = _add_pawn_move(buf, n, sq, low.bit_length() - 1, CAPTURE)
+            captures ^= low
+        if board.ep_square is not None and attacks & SQUARE_BB[board.ep_square]:
+            buf[n] = encode_move(sq, board.ep_square, EP_CAPTURE)
+            n += 1
+    elif kind == KNIGHT:
+        n = _add_targets(buf, n, sq, KNIGHT_ATTACKS[sq] & ~own, enemy)
+    elif kind == BISHOP:
+        n = _add_targets(buf, n, sq, bishop_attacks(sq, occ) & ~own, enemy)
+    elif kind == ROOK:
+        n = _add_targets(buf, n, sq, rook_attacks(sq, occ) & ~own, enemy)
+    elif kind == QUEEN:
+        n = _add_targets(buf, n, sq, queen_attacks(sq, occ) & ~own, enemy)
+    elif kind == KING:
+        n = _add_targets(buf, n, sq, KING_ATTACKS[sq] & ~own, enemy)
+        if sq == KING_HOME[color]:
+            rook = board.pieces[make_piece(color, ROOK)]
+            if (board.castling & KINGSIDE_RIGHTS[color] and rook & SQUARE_BB[sq + 3]
+                    and not occ & (SQUARE_BB[sq + 1] | SQUARE_BB[sq + 2])):
+                buf[n] = encode_move(sq, sq + 2, KING_CASTLE)
+                n += 1
+            if (board.castling & QUEENSIDE_RIGHTS[color] and rook & SQUARE_BB[sq - 4]
+                    and not occ & (SQUARE_BB[sq - 1] | SQUARE_BB[sq - 2] | SQUARE_BB[sq - 3])):
+                buf[n] = encode_move(sq, sq - 2, QUEEN_CASTLE)
+                n += 1
+    return n
+
+
+def generate_pseudo_legal(board, buf):
+    n = 0
+    own = board.occupied[board.side]
+    while own:
+        low = own & -own
+        n = piece_moves(board, low.bit_length() - 1, buf, n)
+        own ^= low
+    return n
+
+
+def is_legal(board, move):
+    # Play the move and make sure the mover's king is not left attacked
+    color = board.squares[move & 63] >> 3
+    board.make_move(move)
+    legal = not board.in_check(color)
+    board.unmake_move()
+    return legal
+
+
+def pins_and_checkers(board, us, ksq, occ):
+    # Checkers attack our king directly; a pinned piece is the only piece
+    # standing between our king and an enemy slider on the same line
+    them = us ^ 1
+    pieces = board.pieces
+    base = them << 3
+    queens = pieces[base | QUEEN]
+    enemy = board.occupied[them]
+    checkers = board.attackers_to(ksq, them, occ)
+
+    pinned = 0
+    snipers = ((rook_attacks(ksq, enemy) & (pieces[base | ROOK] | queens))
+               | (bishop_attacks(ksq, enemy) & (pieces[base | BISHOP] | queens)))
+    own = board.occupied[us]
+    while snipers:
+        low = snipers & -snipers
+        blockers = BETWEEN[ksq][low.bit_length() - 1] & occ
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pinned |= blockers
+        snipers ^= low
+    return pinned, checkers
+
+
+def generate_legal(board, buf, from_mask=FULL, kinds=ALL_MOVES):
+    # Legal moves for the side to move, optionally limited to the pieces on
+    # from_mask and to CAPTURES or QUIETS, written into buf; returns the move
+    # count. Pins and checks are worked out once up front so every move is
+    # legal without a trial make.
+    n = 0
+    us = board.side
+    them = us ^ 1
+    pieces = board.pieces
+    base = us << 3
+    own = board.occupied[us]
+    enemy = board.occupied[them]
+    occ = own | enemy
+    allowed = 0
+    if kinds & CAPTURES:
+        allowed |= enemy
+    if kinds & QUIETS:
+        allowed |= FULL ^ occ
+
+    ksq = board.king_sq[us]
+    if ksq is None:
+        return n
+    king = SQUARE_BB[ksq]
+    pinned, checkers = pins_and_checkers(board, us, ksq, occ)
+
+    # King moves are tested with the king lifted off the board so it cannot
+    # hide behind itself on a slider's ray
+    if king & from_mask:
+        occ_without_king = occ ^ king
+        targets = KING_ATTACKS[ksq] & allowed
+        while targets:
+            low = targets & -targets
+            to = low.bit_length() - 1
+            if not board.is_square_attacked(to, them, occ_without_king):
+                buf[n] = ksq | (to << 6) | (CAPTURE << 12 if low & enemy else 0)
+                n += 1
+            targets ^= low
+
+        # Castling: not out of, through or into check
+        if kinds & QUIETS and not checkers and ksq == KING_HOME[us]:
+            rook = pieces[base | ROOK]
+            if (board.castling & KINGSIDE_RIGHTS[us] and rook & SQUARE_BB[ksq + 3]
+                    and not occ & (SQUARE_BB[ksq + 1] | SQUARE_BB[ksq + 2])
+                    and not board.is_square_attacked(ksq + 1, them, occ)
+                    and not board.is_square_attacked(ksq + 2, them, occ)):
+                buf[n] = encode_move(ksq, ksq + 2, KING_CASTLE)
+                n += 1
+            if (board.castling & QUEENSIDE_RIGHTS[us] and rook & SQUARE_BB[ksq - 4]
+                    and not occ & (SQUARE_BB[ksq - 1] | SQUARE_BB[ksq - 2] | SQUARE_BB[ksq - 3])
+                    and not board.is_square_attacked(ksq - 1, them, occ)
+                    and not board.is_square_attacked(ksq - 2, them, occ)):
+                buf[n] = encode_move(ksq, ksq - 2, QUEEN_CASTLE)
+                n += 1
+
+    # In check only the king, a capture of the checker or a block can help
+    if checkers:
+        if checkers & (checkers - 1):
+            # Double check: only the king may move
+            return n
+        return _add_evasions(board, buf, n, us, ksq, checkers, pinned, from_mask, kinds)
+
+    target_mask = allowed
+
+    # Pawn pushes onto the last rank are promotions and go with the captures
+    push_mask = 0
+    if kinds & CAPTURES:
+        push_mask |= PROMOTION_RANKS
+    if kinds & QUIETS:
+        push_mask |= FULL ^ PROMOTION_RANKS
+    capture_mask = enemy if kinds & CAPTURES else 0
+
+    queens = pieces[base | QUEEN]
+    for bb, attack in ((pieces[base | KNIGHT], None),
+                       (pieces[base | BISHOP] | queens, bishop_attacks),
+                       (pieces[base | ROOK] | queens, rook_attacks)):
+        bb &= from_mask
+        while bb:
+            low = bb & -bb
+            sq = low.bit_length() - 1
+            if attack is None:
+                # A pinned knight can never move
+                targets = 0 if low & pinned else KNIGHT_ATTACKS[sq] & target_mask
+            else:
+                targets = attack(sq, occ) & target_mask
+                if low & pinned:
+                    targets &= LINE[ksq][sq]
+            n = _add_targets(buf, n, sq, targets, enemy)
+            bb ^= low
+
+    pawns = pieces[base | PAWN] & from_mask
+    step = -8 if us == WHITE else 8
+    start_row = 6 if us == WHITE else 1
+    attacks_table = PAWN_ATTACKS[us]
+    ep_square = board.ep_square
+    while pawns:
+        low = pawns & -pawns
+        sq = low.bit_length() - 1
+        pin_line = LINE[ksq][sq] if low & pinned else FULL
+
+        to = sq + step
+        if not occ & SQUARE_BB[to]:
+            if SQUARE_BB[to] & push_mask & pin_line:
+                n = _add_pawn_move(buf, n, sq, to, QUIET)
+            to2 = to + step
+            if sq >> 3 == start_row and not occ & SQUARE_BB[to2] and SQUARE_BB[to2] & push_mask & pin_line:
+                buf[n] = encode_move(sq, to2, DOUBLE_PUSH)
+                n += 1
+
+        captures = attacks_table[sq] & capture_mask & pin_line
+        while captures:
+            cap = captures & -captures
+            n = _add_pawn_move(buf, n, sq, cap.bit_length() - 1, CAPTURE)
+            captures ^= cap
+
+        # En passant can uncover a check along the rank, so it keeps the
+        # trial-move test; it is rare enough not to matter
+        if kinds & CAPTURES and ep_square is not None and attacks_table[sq] & SQUARE_BB[ep_square]:
+            move = encode_move(sq, ep_square, EP_CAPTURE)
+            if is_legal(board, move):
+                buf[n] = move
+                n += 1
+        pawns ^= low
+
+    return n
+
+
+def is_valid_move(board, move, buf=None):
+    # Whether a move from elsewhere (a killer slot, a hash table entry) is
+    # legal in this position; only the moving piece's moves are generated.
+    # Callers in a hot loop pass their own scratch buffer.
+    frm = move & 63
+    if not board.occupied[board.side] & SQUARE_BB[frm]:
+        return False
+    if buf is None:
+        buf = new_move_buffer()
+    n = generate_legal(board, buf, SQUARE_BB[frm])
+    return move in buf[:n]
+
+
+def generate_captures(board, buf):
+    return generate_legal(board, buf, FULL, CAPTURES)
+
+
+def generate_quiets(board, buf):
+    return generate_legal(board, buf, FULL, QUIETS)
+
+
+def _add_evasions(board, buf, n, us, ksq, checkers, pinned, from_mask, kinds):
+    # Non-king replies to a single check, found by looking back from the
+    # checker's square and the squares between it and the king rather than
+    # generating every move and discarding most of them. Pinned pieces can
+    # never help, since moving them would expose the king as well.
+    them = us ^ 1
+    pieces = board.pieces
+    base = us << 3
+    occ = board.occupied[0] | board.occupied[1]
+    movable = board.occupied[us] & from_mask & ~pinned & ~SQUARE_BB[ksq]
+    queens = pieces[base | QUEEN]
+    knights = pieces[base | KNIGHT] & movable
+    diagonal = (pieces[base | BISHOP] | queens) & movable
+    straight = (pieces[base | ROOK] | queens) & movable
+    pawns = pieces[base | PAWN] & movable
+    checker_sq = checkers.bit_length() - 1
+    back = 8 if us == WHITE else -8
+
+    if kinds & CAPTURES:
+        attackers = ((KNIGHT_ATTACKS[checker_sq] & knights)
+                     | (bishop_attacks(checker_sq, occ) & diagonal)
+                     | (rook_attacks(checker_sq, occ) & straight))
+        capture = checker_sq << 6 | CAPTURE << 12
+        while attackers:
+            low = attackers & -attackers
+            buf[n] = (low.bit_length() - 1) | capture
+            n += 1
+            attackers ^= low
+
+        attackers = PAWN_ATTACKS[them][checker_sq] & pawns
+        while attackers:
+            low = attackers & -attackers
+            n = _add_pawn_move(buf, n, low.bit_length() - 1, checker_sq, CAPTURE)
+            attackers ^= low
+
+        # A checking pawn that has just moved two squares can also be taken
+        # en passant; the trial move catches a rank pin
+        ep_square = board.ep_square
+        if ep_square is not None and checker_sq == ep_square + back:
+            attackers = PAWN_ATTACKS[them][ep_square] & pawns
+            while attackers:
+                low = attackers & -attackers
+                move = encode_move(low.bit_length() - 1, ep_square, EP_CAPTURE)
+                if is_legal(board, move):
+                    buf[n] = move
+                    n += 1
+                attackers ^= low
+
+    blocks = BETWEEN[ksq][checker_sq]
+    if not kinds & QUIETS:
+        # Only promotions block in the capture stage
+        blocks &= PROMOTION_RANKS
+    double_row = 4 if us == WHITE else 3
+    while blocks:
+        low = blocks & -blocks
+        sq = low.bit_length() - 1
+        if kinds & QUIETS:
+            blockers = ((KNIGHT_ATTACKS[sq] & knights)
+                        | (bishop_attacks(sq, occ) & diagonal)
+                        | (rook_attacks(sq, occ) & straight))
+            while blockers:
+                blocker = blockers & -blockers
+                buf[n] = (blocker.bit_length() - 1) | (sq << 6)
+                n += 1
+                blockers ^= blocker
+
+        frm = sq + back
+        if 0 <= frm < 64 and pawns & SQUARE_BB[frm]:
+            if low & PROMOTION_RANKS:
+                if kinds & CAPTURES:
+                    n = _add_pawn_move(buf, n, frm, sq, QUIET)
+            elif kinds & QUIETS:
+                buf[n] = frm | (sq << 6)
+                n += 1
+        elif (kinds & QUIETS and sq >> 3 == double_row and not occ & SQUARE_BB[frm]
+                and pawns & SQUARE_BB[frm + back]):
+            buf[n] = encode_move(frm + back, sq, DOUBLE_PUSH)
+            n += 1
+        blocks ^= low
+
+    return n
+
+
+def has_legal_move(board, buf=None):
+    # Whether the side to move has any legal move, for telling checkmate
+    # and stalemate apart from play going on. Returns at the first move
+    # found rather than listing them all; castling never needs checking,
+    # since whenever it is legal the king's one-square step is too.
+    us = board.side
+    them = us ^ 1
+    pieces = board.pieces
+    base = us << 3
+    own = board.occupied[us]
+    occ = own | board.occupied[them]
+    free = FULL ^ own
+    ksq = board.king_sq[us]
+    if ksq is None:
+        return False
+
+    occ_without_king = occ ^ SQUARE_BB[ksq]
+    targets = KING_ATTACKS[ksq] & free
+    while targets:
+        low = targets & -targets
+        if not board.is_square_attacked(low.bit_length() - 1, them, occ_without_king):
+            return True
+        targets ^= low
+
+    pinned, checkers = pins_and_checkers(board, us, ksq, occ)
+    if checkers:
+        if checkers & (checkers - 1):
+            return False
+        if buf is None:
+            buf = new_move_buffer()
+        return _add_evasions(board, buf, 0, us, ksq, checkers, pinned, FULL, ALL_MOVES) > 0
+
+    knights = pieces[base | KNIGHT] & ~pinned
+    while knights:
+        low = knights & -knights
+        if KNIGHT_ATTACKS[low.bit_length() - 1] & free:
+            return True
+        knights ^= low
+
+    queens = pieces[base | QUEEN]
+    for bb, attack in ((pieces[base | BISHOP] | queens, bishop_attacks),
+                       (pieces[base | ROOK] | queens, rook_attacks)):
+        while bb:
+            low = bb & -bb
+            sq = low.bit_length() - 1
+            targets = attack(sq, occ) & free
+            if low & pinned:
+                targets &= LINE[ksq][sq]
+            if targets:
+                return True
+            bb ^= low
+
+    pawns = pieces[base | PAWN]
+    step = -8 if us == WHITE else 8
+    attacks_table = PAWN_ATTACKS[us]
+    enemy = board.occupied[them]
+    ep_square = board.ep_square
+    while pawns:
+        low = pawns & -pawns
+        sq = low.bit_length() - 1
+        pin_line = LINE[ksq][sq] if low & pinned else FULL
+        if SQUARE_BB[sq + step] & pin_line & ~occ:
+            return True
+        if attacks_table[sq] & enemy & pin_line:
+            return True
+        if (ep_square is not None and attacks_table[sq] & SQUARE_BB[ep_square]
+                and is_legal(board, encode_move(sq, ep_square, EP_CAPTURE))):
+            return True
+        pawns ^= low
+
+    return False
+
+
+def generate_evasions(board, buf):
+    # Legal replies when the side to move is in check
+    return generate_legal(board, buf)
+
+
+def generate_legal_moves(board, buf, color=None):
+    # The one entry point for a whole side's legal moves: every piece is
+    # walked once with shared pin and check information. Moves for the side
+    # not on move are generated by passing the turn, which analysis such as
+    # mobility needs. If the side to move is in check, capturing its king
+    # is left out, since no such move could ever be played.
+    if color is None or color == board.side:
+        return generate_legal(board, buf)
+    king_sq = board.king_sq[board.side]
+    board.make_null_move()
+    count = generate_legal(board, buf)
+    board.unmake_null_move()
+    n = 0
+    for i in range(count):
+        move = buf[i]
+        if (move >> 6) & 63 != king_sq:
+            buf[n] = move
+            n += 1
+    return n
+
+
+def legal_moves(board, from_mask=FULL):
+    # Convenience wrapper returning a fresh list, for callers outside the
+    # hot path such as the UI
+    buf = new_move_buffer()
+    return buf[:generate_legal(board, buf, from_mask)].tolist()
+
+
+def legal_moves_from(board, sq):
+    return legal_moves(board, SQUARE_BB[sq])
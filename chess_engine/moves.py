@@ -0,0 +1,64 @@
+# Moves are packed into 16 bits: bits 0-5 hold the from square, bits 6-11
+# the to square and bits 12-15 a flag. Capture flags have bit 2 of the flag
+# set and promotion flags bit 3, with the promoted piece in the low two bits.
+# Move lists live in preallocated array('H') buffers filled by index.
+
+from array import array
+
+from .pieces import KNIGHT, square_name
+
+QUIET = 0
+DOUBLE_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EP_CAPTURE = 5
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+
+NULL_MOVE = 0
+
+# Legal positions never have more than 218 moves
+MAX_MOVES = 256
+
+PROMOTION_LETTERS = "nbrq"
+
+
+def new_move_buffer():
+    return array("H", bytes(2 * MAX_MOVES))
+
+
+def encode_move(frm, to, flag=QUIET):
+    return frm | (to << 6) | (flag << 12)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_flag(move):
+    return move >> 12
+
+
+def is_capture(move):
+    return bool(move & 0x4000)
+
+
+def is_promotion(move):
+    return bool(move & 0x8000)
+
+
+def promotion_type(move):
+    # Piece type promoted to, or 0 for other moves
+    return ((move >> 12) & 3) + KNIGHT if move & 0x8000 else 0
+
+
+def move_to_uci(move):
+    uci = square_name(move & 63) + square_name((move >> 6) & 63)
+    if move & 0x8000:
+        uci += PROMOTION_LETTERS[(move >> 12) & 3]
+    return uci
@@ -0,0 +1,116 @@
+# Perft counts every leaf of the legal move tree to a fixed depth. Matching
+# the published counts below is the standard check that move generation and
+# make_move are correct, and nodes per second is our throughput benchmark.
+#
+#   python -m chess_engine --depth 4
+#   python -m chess_engine --fen "<fen>" --depth 3 --divide
+
+import argparse
+import time
+
+from .board import Board, START_FEN
+from .movegen import generate_legal, legal_moves
+from .moves import new_move_buffer, move_to_uci
+
+# (name, FEN, node counts for depth 1, 2, 3, ...)
+REFERENCE_POSITIONS = [
+    ("start", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("en-passant", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotion", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("castling", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, depth):
+    if depth <= 0:
+        return 1
+    buffers = [new_move_buffer() for _ in range(depth)]
+    return _perft(board, depth, buffers)
+
+
+def _perft(board, depth, buffers):
+    # One preallocated move buffer per remaining ply
+    buf = buffers[depth - 1]
+    count = generate_legal(board, buf)
+    # Bulk counting: the last ply only needs the number of legal moves
+    if depth == 1:
+        return count
+    nodes = 0
+    make_move = board.make_move
+    unmake_move = board.unmake_move
+    for i in range(count):
+        make_move(buf[i])
+        nodes += _perft(board, depth - 1, buffers)
+        unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    # Node counts below each root move, for bisecting a perft mismatch
+    counts = {}
+    for move in legal_moves(board):
+        board.make_move(move)
+        counts[move_to_uci(move)] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def run_perft(fen, depth, expected=None):
+    board = Board.from_fen(fen)
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    elapsed = time.perf_counter() - start
+    ok = expected is None or nodes == expected
+    return nodes, elapsed, ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft benchmark and move generator check")
+    parser.add_argument("--depth", type=int, default=3, help="search depth (default 3)")
+    parser.add_argument("--fen", help="run a single position instead of the reference set")
+    parser.add_argument("--position", choices=[name for name, _, _ in REFERENCE_POSITIONS],
+                        help="run a single reference position")
+    parser.add_argument("--divide", action="store_true", help="print node counts per root move")
+    args = parser.parse_args(argv)
+    if args.depth < 1:
+        parser.error("--depth must be at least 1")
+
+    if args.fen:
+        positions = [("fen", args.fen, [])]
+    else:
+        positions = [p for p in REFERENCE_POSITIONS if args.position in (None, p[0])]
+
+    failures = 0
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, counts in positions:
+        depth = args.depth
+        if not args.fen and depth > len(counts):
+            # Don't run deeper than we have reference numbers for
+            depth = len(counts)
+
+        if args.divide:
+            for move, count in sorted(divide(Board.from_fen(fen), depth).items()):
+                print(f"{move}: {count}")
+
+        expected = counts[depth - 1] if depth <= len(counts) else None
+        nodes, elapsed, ok = run_perft(fen, depth, expected)
+        total_nodes += nodes
+        total_time += elapsed
+        status = "ok" if expected is None or ok else f"MISMATCH (expected {expected})"
+        nps = nodes / elapsed if elapsed > 0 else 0
+        print(f"{name:<12} depth {depth}  nodes {nodes:>10}  {elapsed:7.2f}s  {nps:>10.0f} nps  {status}")
+        if not ok:
+            failures += 1
+
+    if len(positions) > 1 and total_time > 0:
+        print(f"{'total':<12}          nodes {total_nodes:>10}  {total_time:7.2f}s  {total_nodes / total_time:>10.0f} nps")
+    return 1 if failures else 0
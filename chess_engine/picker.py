@@ -0,0 +1,112 @@
+# Staged, ordered move generation for search. Moves come out as the hash
+# move, then captures and promotions, then killer moves and the
+# countermove, then the remaining quiet moves. Each stage is generated only
+# when the caller asks for a move past the end of the previous one, so a
+# node that cuts off on an early capture never pays for generating its quiet
+# moves.
+#
+# Within a stage, moves are scored into an int array alongside the move
+# buffer and visited best first: captures by MVV-LVA (most valuable victim,
+# then least valuable attacker), quiet moves by the search's history table.
+
+from array import array
+
+from .evaluate import PIECE_VALUES
+from .movegen import generate_captures, generate_quiets, is_valid_move
+from .moves import NULL_MOVE, EP_CAPTURE, PROMOTION, MAX_MOVES, new_move_buffer
+from .pieces import PAWN, KNIGHT
+
+# Captures and promotions have one of the top two flag bits set
+TACTICAL_BITS = 0xC000
+
+
+def new_picker_buffers():
+    # One buffer per stage; searches keep a pair per ply
+    return new_move_buffer(), new_move_buffer()
+
+
+def new_score_buffer():
+    return array("i", bytes(4 * MAX_MOVES))
+
+
+def history_index(side, move):
+    # Butterfly index: side to move, from square and to square
+    return side << 12 | (move & 0xFFF)
+
+
+class MovePicker:
+    def __init__(self, buffers=None):
+        self.capture_buf, self.quiet_buf = buffers if buffers is not None else new_picker_buffers()
+        self.capture_scores = new_score_buffer()
+        self.quiet_scores = new_score_buffer()
+        # Scratch space for checking hash and killer moves, so pickers in
+        # different threads never share a buffer
+        self.check_buf = new_move_buffer()
+
+    def moves(self, board, hash_move=NULL_MOVE, killers=(), countermove=NULL_MOVE, history=None):
+        # Yields legal moves lazily. The board may be changed between moves
+        # as long as it is restored before asking for the next one. Without a
+        # history table quiet moves keep generation order.
+        if hash_move and is_valid_move(board, hash_move, self.check_buf):
+            yield hash_move
+        else:
+            hash_move = NULL_MOVE
+
+        buf = self.capture_buf
+        for i in self._ordered_captures(board):
+            move = buf[i]
+            if move != hash_move:
+                yield move
+
+        played = [hash_move]
+        for move in (*killers, countermove):
+            if (move and not move & TACTICAL_BITS and move not in played
+                    and is_valid_move(board, move, self.check_buf)):
+                played.append(move)
+                yield move
+
+        buf = self.quiet_buf
+        n = generate_quiets(board, buf)
+        if history is None:
+            order = range(n)
+        else:
+            scores = self.quiet_scores
+            base = board.side << 12
+            for i in range(n):
+                scores[i] = history[base | (buf[i] & 0xFFF)]
+            order = sorted(range(n), key=scores.__getitem__, reverse=True)
+        for i in order:
+            move = buf[i]
+            if move not in played:
+                yield move
+
+    def captures(self, board):
+        # Just the capture stage, best first, for quiescence search
+        buf = self.capture_buf
+        for i in self._ordered_captures(board):
+            yield buf[i]
+
+    def _ordered_captures(self, board):
+        # Generates captures and promotions into the capture buffer and
+        # returns their indices by MVV-LVA score
+        buf = self.capture_buf
+        scores = self.capture_scores
+        n = generate_captures(board, buf)
+        squares = board.squares
+        for i in range(n):
+            move = buf[i]
+            flag = move >> 12
+            if flag == EP_CAPTURE:
+                victim = PAWN
+            else:
+                victim = squares[(move >> 6) & 63] & 7
+            score = PIECE_VALUES[victim] * 8 - (squares[move & 63] & 7)
+            if flag & PROMOTION:
+                score += PIECE_VALUES[(flag & 3) + KNIGHT] * 8
+            scores[i] = score
+        return sorted(range(n), key=scores.__getitem__, reverse=True)
+
+
+def staged_moves(board, buffers, hash_move=NULL_MOVE, killers=()):
+    # The picker's move order for a one-off caller with its own buffers
+    return MovePicker(buffers).moves(board, hash_move, killers)
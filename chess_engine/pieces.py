@@ -0,0 +1,50 @@
+# Integer piece codes shared by every engine module. A code packs the colour
+# into bit 3 and the piece type into the low three bits, so white pieces are
+# 1-6, black pieces are 9-14 and 0 is an empty square.
+
+WHITE = 0
+BLACK = 1
+
+EMPTY = 0
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+
+PIECE_TYPES = (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING)
+
+
+def make_piece(color, piece_type):
+    return (color << 3) | piece_type
+
+
+def piece_color(code):
+    return code >> 3
+
+
+def piece_type(code):
+    return code & 7
+
+
+# Squares follow ChessGame's board[row][col] layout: row 0 is Black's back
+# rank, so a8 is square 0 and h1 is square 63.
+def square(row, col):
+    return row * 8 + col
+
+
+def square_row(sq):
+    return sq >> 3
+
+
+def square_col(sq):
+    return sq & 7
+
+
+def square_name(sq):
+    return "abcdefgh"[sq & 7] + str(8 - (sq >> 3))
+
+
+def parse_square(name):
+    return square(8 - int(name[1]), "abcdefgh".index(name[0]))
@@ -0,0 +1,89 @@
+# Immutable snapshots of a position, 46 bytes each, for handing positions to
+# worker processes, keeping them in caches or writing them to disk. A
+# Position is a value: it compares and hashes by content and pickles as its
+# bytes. Board is the mutable playing surface; Board.snapshot() and
+# Board.from_position() convert between the two.
+#
+# Layout: 32 bytes of piece codes, two squares per byte (low nibble first),
+# then one byte each for side and castling (side in bit 4) and the en passant
+# square (255 for none), two bytes each of halfmove clock and move number,
+# and eight of Zobrist key.
+
+import struct
+
+_LAYOUT = struct.Struct("<32sBBHHQ")
+NO_EP_SQUARE = 255
+
+
+class Position:
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        if len(data) != _LAYOUT.size:
+            raise ValueError(f"a position is {_LAYOUT.size} bytes, got {len(data)}")
+        object.__setattr__(self, "_data", bytes(data))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data)
+
+    @classmethod
+    def pack(cls, squares, side, castling, ep_square, halfmove, fullmove, key):
+        packed = bytes(squares[i] | squares[i + 1] << 4 for i in range(0, 64, 2))
+        ep = NO_EP_SQUARE if ep_square is None else ep_square
+        return cls(_LAYOUT.pack(packed, side << 4 | castling, ep, halfmove, fullmove, key))
+
+    def to_bytes(self):
+        return self._data
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        return (Position, (self._data,))
+
+    def __eq__(self, other):
+        return isinstance(other, Position) and self._data == other._data
+
+    def __hash__(self):
+        return hash(self._data)
+
+    def __repr__(self):
+        return f"Position({self._data.hex()})"
+
+    @property
+    def squares(self):
+        # Piece codes for all 64 squares, as in Board.squares
+        squares = bytearray(64)
+        for i, byte in enumerate(self._data[:32]):
+            squares[2 * i] = byte & 15
+            squares[2 * i + 1] = byte >> 4
+        return bytes(squares)
+
+    @property
+    def side(self):
+        return self._data[32] >> 4
+
+    @property
+    def castling(self):
+        return self._data[32] & 15
+
+    @property
+    def ep_square(self):
+        ep = self._data[33]
+        return None if ep == NO_EP_SQUARE else ep
+
+    @property
+    def halfmove(self):
+        return _LAYOUT.unpack(self._data)[3]
+
+    @property
+    def fullmove(self):
+        return _LAYOUT.unpack(self._data)[4]
+
+    @property
+    def key(self):
+        return _LAYOUT.unpack(self._data)[5]
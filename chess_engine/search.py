@@ -0,0 +1,323 @@
+# Alpha-beta search for the computer player: negamax with iterative
+# deepening, so a search cut short by its budget still returns the best move
+# of the last depth it finished. Moves come from the staged picker, with
+# the previous iteration's best move tried first at the root and the
+# transposition table's move first everywhere else; after captures, quiet
+# moves are ordered by two killer slots per ply, a countermove table and a
+# butterfly history table, all filled in by earlier cutoffs. At the horizon
+# a quiescence search plays out captures and promotions until the position
+# is quiet, so the evaluation never lands in the middle of an exchange.
+# A TimeManager bounds how long a search may take.
+
+from array import array
+
+from .bitboard import ROW_MASKS
+from .board import Board
+from .evaluate import evaluate, MATE_SCORE, DRAW_SCORE, PIECE_VALUES
+from .movegen import generate_legal
+from .moves import NULL_MOVE, EP_CAPTURE, PROMOTION, new_move_buffer
+from .picker import MovePicker, TACTICAL_BITS, history_index
+from .pieces import PAWN, QUEEN
+from .timeman import TimeManager
+from .tt import TranspositionTable, LOWER_BOUND, UPPER_BOUND, EXACT, score_to_tt, score_from_tt
+
+MAX_PLY = 64
+INFINITY = MATE_SCORE + 1
+
+# Search budget per difficulty level: (maximum depth, soft and hard time
+# limits in seconds)
+DIFFICULTY_LIMITS = {
+    1: (1, 0.2, 0.5),
+    2: (3, 0.6, 1.5),
+    3: (MAX_PLY, 1.5, 3.0),
+}
+
+# How often, in nodes, the budget is checked; a few milliseconds of search
+CHECK_INTERVAL = 256
+
+# Budget of a one-off search() call given no other limit: a couple of
+# seconds of search
+DEFAULT_NODE_LIMIT = 100000
+
+# Delta pruning: a capture that would still leave the score this far below
+# alpha even after winning the piece is not worth searching
+DELTA_MARGIN = 200
+
+# Rows a pawn promotes from, indexed by colour (a8 is row 0)
+SEVENTH_RANKS = [ROW_MASKS[1], ROW_MASKS[6]]
+
+# A capture of a defended piece is skipped in quiescence only when the
+# capturer is worth this much more than its victim, so even trades such as
+# bishop for knight are still searched
+BAD_CAPTURE_MARGIN = 50
+
+# History scores are halved between searches and whenever one passes this,
+# so old cutoffs fade and the int array cannot overflow
+HISTORY_LIMIT = 1 << 24
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class Search:
+    def __init__(self, max_depth=MAX_PLY, node_limit=None, tt=None, time_manager=None):
+        self.max_depth = min(max_depth, MAX_PLY - 1)
+        self.node_limit = node_limit
+        self.time_manager = time_manager
+        self.stop = None
+        # Pass a table to keep its results between searches, or reuse the
+        # Search itself, as a game does, to keep its move ordering tables too
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.pickers = [MovePicker() for _ in range(MAX_PLY)]
+        self.root_buffer = new_move_buffer()
+        # Two quiet moves per ply that caused cutoffs, newest first
+        self.killers = array("H", bytes(4 * MAX_PLY))
+        # Cutoff counts weighted by depth, by side and from/to squares
+        self.history = array("i", bytes(4 * 2 * 4096))
+        # The quiet move that last refuted each previous move, by its squares
+        self.countermoves = array("H", bytes(2 * 4096))
+        self.nodes = 0
+        self.best_move = NULL_MOVE
+        self.best_score = 0
+        self.depth = 0
+
+    def set_difficulty(self, difficulty):
+        # Depth and time limits for a difficulty level from 1 to 3
+        max_depth, soft_limit, hard_limit = DIFFICULTY_LIMITS.get(difficulty, DIFFICULTY_LIMITS[2])
+        self.max_depth = min(max_depth, MAX_PLY - 1)
+        self.node_limit = None
+        self.time_manager = TimeManager(soft_limit, hard_limit)
+
+    def run(self, board, stop=None):
+        # Search a private copy: an aborted search can leave it half-played,
+        # and it is a plain Board whatever the caller's board tracks. stop is
+        # an optional threading.Event for abandoning a search run in another
+        # thread.
+        self.board = Board.from_position(board.snapshot())
+        self.stop = stop
+        self.board.key_history = board.key_history[:]
+        self.nodes = 0
+        self.best_move = NULL_MOVE
+        self.best_score = 0
+        self.depth = 0
+        self.tt.new_search()
+        # The game has moved on two plies since the last search, so its
+        # killers are shifted to the plies they now belong to, and the
+        # history fades rather than starting over
+        killers = self.killers
+        killers[:-4] = killers[4:]
+        self._age_history()
+        time_manager = self.time_manager
+        if time_manager is not None:
+            time_manager.start()
+
+        buf = self.root_buffer
+        count = generate_legal(self.board, buf)
+        if not count:
+            return NULL_MOVE
+        root_moves = list(buf[:count])
+        self.best_move = root_moves[0]
+        if count == 1:
+            return self.best_move
+
+        try:
+            for depth in range(1, self.max_depth + 1):
+                if time_manager is not None:
+                    iteration_start = time_manager.elapsed()
+                score, move = self._search_root(root_moves, depth)
+                self.best_move, self.best_score, self.depth = move, score, depth
+                # Search the best move first next time round
+                root_moves.remove(move)
+                root_moves.insert(0, move)
+                if abs(score) >= MATE_SCORE - MAX_PLY:
+                    break
+                if (time_manager is not None
+                        and not time_manager.start_iteration(time_manager.elapsed() - iteration_start)):
+                    break
+        except SearchAborted:
+            pass
+        return self.best_move
+
+    def _search_root(self, root_moves, depth):
+        board = self.board
+        alpha = -INFINITY
+        best_move = root_moves[0]
+        for move in root_moves:
+            board.make_move(move)
+            score = -self._negamax(depth - 1, -INFINITY, -alpha, 1)
+            board.unmake_move()
+            if score > alpha:
+                alpha = score
+                best_move = move
+                if not self.depth:
+                    # Cut off during the first iteration, the best move so
+                    # far is all there is to play
+                    self.best_move = move
+        return alpha, best_move
+
+    def _negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes % CHECK_INTERVAL:
+            self._check_limits()
+
+        board = self.board
+        if board.halfmove >= 100 or board.is_repetition():
+            return DRAW_SCORE
+
+        in_check = board.in_check(board.side)
+        if in_check:
+            # Look one ply further at checks rather than stopping in them
+            depth += 1
+        if ply >= MAX_PLY - 1:
+            return evaluate(board)
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply)
+
+        # A stored result at least this deep can settle the node outright;
+        # otherwise its move is still the best guess to search first
+        key = board.key
+        tt_move = NULL_MOVE
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, tt_bound = entry
+            if tt_depth >= depth:
+                tt_score = score_from_tt(tt_score, ply)
+                if (tt_bound == EXACT or tt_bound == LOWER_BOUND and tt_score >= beta
+                        or tt_bound == UPPER_BOUND and tt_score <= alpha):
+                    return tt_score
+
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = NULL_MOVE
+        moves = 0
+        killers = self.killers
+        previous = board.undo_stack[-1][0] & 0xFFF if board.undo_stack else 0
+        picker = self.pickers[ply].moves(board, tt_move, (killers[2 * ply], killers[2 * ply + 1]),
+                                         self.countermoves[previous], self.history)
+        for move in picker:
+            moves += 1
+            board.make_move(move)
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        if not move & TACTICAL_BITS:
+                            self._record_cutoff(move, depth, ply, previous)
+                        break
+
+        if not moves:
+            # Mate scores count plies from the root so nearer mates win
+            return -MATE_SCORE + ply if in_check else DRAW_SCORE
+
+        if best >= beta:
+            bound = LOWER_BOUND
+        elif best > original_alpha:
+            bound = EXACT
+        else:
+            # Every move failed low, so none of them is known to be best
+            bound = UPPER_BOUND
+            best_move = NULL_MOVE
+        self.tt.store(key, best_move, score_to_tt(best, ply), depth, bound)
+        return best
+
+    def _check_limits(self):
+        # The node limit lets the first iteration finish, so there is a fully
+        # searched move to fall back on; the hard deadline never waits
+        if self.depth and self.node_limit and self.nodes >= self.node_limit:
+            raise SearchAborted
+        if self.time_manager is not None and self.time_manager.hard_expired():
+            raise SearchAborted
+        if self.stop is not None and self.stop.is_set():
+            raise SearchAborted
+
+    def _quiesce(self, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes % CHECK_INTERVAL:
+            self._check_limits()
+
+        board = self.board
+        if ply >= MAX_PLY - 1:
+            return evaluate(board)
+
+        picker = self.pickers[ply]
+        in_check = board.in_check(board.side)
+        if in_check:
+            # No standing pat in check: every evasion is searched
+            best = -INFINITY
+            moves = picker.moves(board)
+        else:
+            # Stand pat: the side to move can usually do at least as well as
+            # the static score by not capturing at all
+            best = evaluate(board)
+            if best >= beta:
+                return best
+            # Not even winning a queen, and promoting a pawn if one is about
+            # to, would bring the score up to alpha
+            margin = PIECE_VALUES[QUEEN] + DELTA_MARGIN
+            if board.pieces[board.side << 3 | PAWN] & SEVENTH_RANKS[board.side]:
+                margin += PIECE_VALUES[QUEEN] - PIECE_VALUES[PAWN]
+            if best + margin < alpha:
+                return best
+            if best > alpha:
+                alpha = best
+            moves = picker.captures(board)
+
+        squares = board.squares
+        searched = 0
+        stand_pat = best
+        for move in moves:
+            searched += 1
+            flag = move >> 12
+            if not in_check and not flag & PROMOTION:
+                to = (move >> 6) & 63
+                victim = PAWN if flag == EP_CAPTURE else squares[to] & 7
+                gain = PIECE_VALUES[victim]
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                # A bigger piece taking a defended smaller one most likely
+                # loses material, and such captures are what make the
+                # quiescence tree explode
+                if (PIECE_VALUES[squares[move & 63] & 7] > gain + BAD_CAPTURE_MARGIN
+                        and board.is_square_attacked(to, board.side ^ 1)):
+                    continue
+            board.make_move(move)
+            score = -self._quiesce(-beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+
+        if in_check and not searched:
+            return -MATE_SCORE + ply
+        return best
+
+    def _record_cutoff(self, move, depth, ply, previous):
+        killers = self.killers
+        if killers[2 * ply] != move:
+            killers[2 * ply + 1] = killers[2 * ply]
+            killers[2 * ply] = move
+        self.countermoves[previous] = move
+        index = history_index(self.board.side, move)
+        self.history[index] += depth * depth
+        if self.history[index] > HISTORY_LIMIT:
+            self._age_history()
+
+    def _age_history(self):
+        history = self.history
+        for i in range(len(history)):
+            history[i] >>= 1
+
+
+def search(board, max_depth=MAX_PLY, node_limit=DEFAULT_NODE_LIMIT, tt=None, time_manager=None):
+    # The best move found within the limits, or NULL_MOVE if there is none.
+    # A one-off search starts with empty move ordering tables; to keep them
+    # between moves, keep a Search and call run, as Game does.
+    return Search(max_depth, node_limit, tt, time_manager).run(board)
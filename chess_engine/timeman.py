@@ -0,0 +1,49 @@
+# Time management for the search. Each move gets a soft limit, after which
+# no new iteration is started, and a hard limit, at which the search is
+# abandoned mid-iteration. The search polls the clock only every few hundred
+# nodes, so keeping time costs next to nothing.
+
+import time
+
+# How many times longer than the last iteration the next is assumed to take
+BRANCHING_ESTIMATE = 3.0
+
+# Budget from a game clock: plan for this many more moves, and never spend
+# more than this share of what is left on one move
+DEFAULT_MOVES_TO_GO = 30
+MAX_SHARE = 0.5
+
+
+class TimeManager:
+    def __init__(self, soft_limit, hard_limit=None, clock=time.monotonic):
+        # Limits are in seconds
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit if hard_limit is not None else soft_limit * 2
+        self.clock = clock
+        self.started = None
+
+    @classmethod
+    def for_clock(cls, remaining, increment=0.0, moves_to_go=DEFAULT_MOVES_TO_GO):
+        # A per-move budget from the time left on a game clock
+        soft = remaining / moves_to_go + increment * 0.8
+        hard = min(soft * 3, remaining * MAX_SHARE)
+        return cls(min(soft, hard), hard)
+
+    def start(self):
+        self.started = self.clock()
+        self.soft_deadline = self.started + self.soft_limit
+        self.hard_deadline = self.started + self.hard_limit
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def hard_expired(self):
+        return self.clock() >= self.hard_deadline
+
+    def start_iteration(self, last_iteration_time):
+        # Whether to begin another iteration: not past the soft limit, and
+        # not so close to the hard one that it would likely be cut off
+        now = self.clock()
+        if now >= self.soft_deadline:
+            return False
+        return now + last_iteration_time * BRANCHING_ESTIMATE <= self.hard_deadline
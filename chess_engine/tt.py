@@ -0,0 +1,110 @@
+# Transposition table: search results by Zobrist key, so a position reached
+# again by another move order is not searched twice. Entries live in flat
+# preallocated arrays sized from a memory budget in megabytes, so the table
+# never grows however long the process runs.
+#
+# Entries come in buckets of two. The first slot keeps the deepest result
+# seen (or anything from an earlier search); the second always takes the
+# newest result that doesn't qualify for the first. Deep results survive
+# while recent shallow ones are still kept close at hand.
+
+from array import array
+
+from .evaluate import MATE_BOUND
+from .moves import NULL_MOVE
+
+# Bound types; 0 marks an empty slot
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+EXACT = 3
+
+# key (8) + move (2) + score (2) + depth (1) + bound (1) + age (1)
+ENTRY_BYTES = 15
+
+DEFAULT_SIZE_MB = 16
+
+
+def score_to_tt(score, ply):
+    # Mate scores are stored as distance from this node, not from the root,
+    # so they stay right when the position turns up at another ply
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        # The largest power-of-two number of buckets that fits the budget
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.size = buckets * 2
+        self.keys = array("Q", bytes(8 * self.size))
+        self.moves = array("H", bytes(2 * self.size))
+        self.scores = array("h", bytes(2 * self.size))
+        self.depths = array("b", bytes(self.size))
+        self.bounds = array("B", bytes(self.size))
+        self.ages = array("B", bytes(self.size))
+        self.age = 0
+
+    def clear(self):
+        for table in (self.keys, self.moves, self.scores, self.depths, self.bounds, self.ages):
+            table[:] = array(table.typecode, bytes(table.itemsize * self.size))
+        self.age = 0
+
+    def new_search(self):
+        # Results from earlier searches become fair game for replacement
+        self.age = (self.age + 1) & 255
+
+    def probe(self, key):
+        # (move, score, depth, bound) for the key, or None
+        index = (key & self.mask) << 1
+        keys = self.keys
+        if keys[index] != key or not self.bounds[index]:
+            index += 1
+            if keys[index] != key or not self.bounds[index]:
+                return None
+        return self.moves[index], self.scores[index], self.depths[index], self.bounds[index]
+
+    def store(self, key, move, score, depth, bound):
+        first = (key & self.mask) << 1
+        second = first + 1
+        keys = self.keys
+        bounds = self.bounds
+        if move == NULL_MOVE:
+            # Keep the best move of an earlier search of this position
+            if keys[first] == key and bounds[first]:
+                move = self.moves[first]
+            elif keys[second] == key and bounds[second]:
+                move = self.moves[second]
+
+        # The first slot takes results at least as deep as the one it holds,
+        # and anything once its entry is left over from an earlier search
+        if (not bounds[first] or depth >= self.depths[first] or self.ages[first] != self.age
+                or keys[first] == key and bound == EXACT):
+            index = first
+        else:
+            index = second
+        keys[index] = key
+        self.moves[index] = move
+        self.scores[index] = score
+        self.depths[index] = depth
+        bounds[index] = bound
+        self.ages[index] = self.age
+
+    def hashfull(self):
+        # Permille of slots written during the current search, from a sample
+        sample = min(self.size, 1000)
+        used = sum(1 for i in range(sample) if self.bounds[i] and self.ages[i] == self.age)
+        return used * 1000 // sample
@@ -0,0 +1,26 @@
+# Zobrist hashing: a position's key is the XOR of one random 64-bit number
+# per (piece, square) plus keys for the side to move, the castling rights
+# and the en passant file. A fixed seed keeps keys stable between runs so
+# they can be stored on disk or shared between processes.
+
+import random
+
+_rng = random.Random(0x5A0B12157)
+
+# Indexed by piece code, then square
+PIECE_KEYS = [[_rng.getrandbits(64) for _ in range(64)] for _ in range(15)]
+
+SIDE_KEY = _rng.getrandbits(64)
+
+# Indexed by a castling-rights mask: 1 = white kingside, 2 = white
+# queenside, 4 = black kingside, 8 = black queenside
+_CASTLING_BITS = [_rng.getrandbits(64) for _ in range(4)]
+CASTLING_KEYS = []
+for _mask in range(16):
+    _key = 0
+    for _bit in range(4):
+        if _mask & (1 << _bit):
+            _key ^= _CASTLING_BITS[_bit]
+    CASTLING_KEYS.append(_key)
+
+EP_FILE_KEYS = [_rng.getrandbits(64) for _ in range(8)]
@@ -1,11 +1,12 @@
 import pygame
 import sys
 import math
-import random
+import threading
 from enum import Enum
 
-# Initialize Pygame
-pygame.init()
+from chess_engine import Game, AttackMapBoard, move_from, move_to, is_promotion, promotion_type
+from chess_engine import ONGOING, CHECKMATE, STALEMATE, FIFTY_MOVES, REPETITION
+from chess_engine import pieces as engine
 
 # Constants
 SCREEN_WIDTH = 800
@@ -22,6 +23,7 @@ LIGHT_SQUARE = (240, 217, 181)
 DARK_SQUARE = (181, 136, 99)
 HIGHLIGHT_COLOR = (106, 176, 76, 180)
 MOVE_HINT_COLOR = (124, 174, 221, 150)
+CHECK_COLOR = (220, 60, 60, 170)
 TEXT_COLOR = (50, 50, 50)
 BUTTON_COLOR = (70, 130, 180)
 BUTTON_HOVER_COLOR = (100, 149, 237)
@@ -46,33 +48,62 @@ class GameState(Enum):
     PAUSED = "paused"
     GAME_OVER = "game_over"
 
+PIECE_SYMBOLS = {
+    (PieceType.KING, PieceColor.WHITE): "♔",
+    (PieceType.QUEEN, PieceColor.WHITE): "♕",
+    (PieceType.ROOK, PieceColor.WHITE): "♖",
+    (PieceType.BISHOP, PieceColor.WHITE): "♗",
+    (PieceType.KNIGHT, PieceColor.WHITE): "♘",
+    (PieceType.PAWN, PieceColor.WHITE): "♙",
+    (PieceType.KING, PieceColor.BLACK): "♚",
+    (PieceType.QUEEN, PieceColor.BLACK): "♛",
+    (PieceType.ROOK, PieceColor.BLACK): "♜",
+    (PieceType.BISHOP, PieceColor.BLACK): "♝",
+    (PieceType.KNIGHT, PieceColor.BLACK): "♞",
+    (PieceType.PAWN, PieceColor.BLACK): "♟",
+}
+
+# Pieces exist only for drawing and click handling; the rules run on the
+# engine board's integer piece codes
 class Piece:
+    __slots__ = ("type", "color", "row", "col")
+
     def __init__(self, piece_type, color, row, col):
         self.type = piece_type
         self.color = color
         self.row = row
         self.col = col
-        self.has_moved = False  # For castling and pawn double move
         
     def get_symbol(self):
-        symbols = {
-            (PieceType.KING, PieceColor.WHITE): "♔",
-            (PieceType.QUEEN, PieceColor.WHITE): "♕",
-            (PieceType.ROOK, PieceColor.WHITE): "♖",
-            (PieceType.BISHOP, PieceColor.WHITE): "♗",
-            (PieceType.KNIGHT, PieceColor.WHITE): "♘",
-            (PieceType.PAWN, PieceColor.WHITE): "♙",
-            (PieceType.KING, PieceColor.BLACK): "♚",
-            (PieceType.QUEEN, PieceColor.BLACK): "♛",
-            (PieceType.ROOK, PieceColor.BLACK): "♜",
-            (PieceType.BISHOP, PieceColor.BLACK): "♝",
-            (PieceType.KNIGHT, PieceColor.BLACK): "♞",
-            (PieceType.PAWN, PieceColor.BLACK): "♟",
-        }
-        return symbols.get((self.type, self.color), "?")
+        return PIECE_SYMBOLS.get((self.type, self.color), "?")
+
+# Mapping between the UI piece enums and the engine's integer codes
+ENGINE_PIECE_TYPES = {
+    PieceType.PAWN: engine.PAWN,
+    PieceType.KNIGHT: engine.KNIGHT,
+    PieceType.BISHOP: engine.BISHOP,
+    PieceType.ROOK: engine.ROOK,
+    PieceType.QUEEN: engine.QUEEN,
+    PieceType.KING: engine.KING,
+}
+ENGINE_COLORS = {PieceColor.WHITE: engine.WHITE, PieceColor.BLACK: engine.BLACK}
+UI_PIECE_TYPES = {code: piece_type for piece_type, code in ENGINE_PIECE_TYPES.items()}
+UI_COLORS = {code: color for color, code in ENGINE_COLORS.items()}
+
+# Headline and reason shown when a game ends in each way
+RESULT_TEXT = {
+    CHECKMATE: "Checkmate",
+    STALEMATE: "Stalemate",
+    FIFTY_MOVES: "Draw by fifty-move rule",
+    REPETITION: "Draw by repetition",
+}
 
 class ChessGame:
-    def __init__(self):
+    def __init__(self, position=None):
+        # Initialize Pygame here rather than at import, so importing this
+        # module (or the engine) starts no SDL subsystems
+        pygame.init()
+        
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Chess Game")
         self.clock = pygame.time.Clock()
@@ -86,43 +117,51 @@ class ChessGame:
         self.game_state = GameState.MENU
         self.selected_difficulty = 1  # 1-3 for easy, medium, hard
         self.player_color = PieceColor.WHITE
-        self.board = self.create_initial_board()
+        
+        # The headless game holds the position and the AI; self.board is a
+        # Piece view of it for drawing and clicks. Games start from the given
+        # engine Position, or the usual starting position.
+        self.start_position = position
+        self.game = Game()
+        # The computer searches in a worker thread, so the window keeps
+        # drawing and handling events while it thinks
+        self.ai_thread = None
+        self.new_game()
+
+    @property
+    def engine_board(self):
+        return self.game.board
+
+    @property
+    def turn(self):
+        return UI_COLORS[self.game.side_to_move]
+
+    def new_game(self):
+        self.stop_ai()
+        # The attack maps make the check highlight and attack queries lookups
+        if self.start_position is None:
+            self.game.new_game(AttackMapBoard.initial())
+        else:
+            self.game.new_game(AttackMapBoard.from_position(self.start_position))
+        self.board = self.create_board_view()
         self.selected_piece = None
-        self.valid_moves = []
-        self.turn = PieceColor.WHITE
+        self.valid_moves = set()
         self.game_over = False
         self.winner = None
-        
-        # Castling tracking
-        self.white_king_moved = False
-        self.black_king_moved = False
-        self.white_rook_a_moved = False
-        self.white_rook_h_moved = False
-        self.black_rook_a_moved = False
-        self.black_rook_h_moved = False
-        
-        # En passant tracking
-        self.en_passant_target = None
+        self.result = ONGOING
         
         # Move history for special moves
         self.move_history = []
 
-    def create_initial_board(self):
+    def create_board_view(self):
         board = [[None for _ in range(8)] for _ in range(8)]
-        
-        # Place pawns
-        for col in range(8):
-            board[1][col] = Piece(PieceType.PAWN, PieceColor.BLACK, 1, col)
-            board[6][col] = Piece(PieceType.PAWN, PieceColor.WHITE, 6, col)
-        
-        # Place other pieces
-        back_row = [PieceType.ROOK, PieceType.KNIGHT, PieceType.BISHOP, PieceType.QUEEN, 
-                   PieceType.KING, PieceType.BISHOP, PieceType.KNIGHT, PieceType.ROOK]
-        
-        for col, piece_type in enumerate(back_row):
-            board[0][col] = Piece(PieceType(piece_type), PieceColor.BLACK, 0, col)
-            board[7][col] = Piece(PieceType(piece_type), PieceColor.WHITE, 7, col)
-            
+        squares = self.engine_board.squares
+        for sq in range(64):
+            code = squares[sq]
+            if code:
+                row, col = engine.square_row(sq), engine.square_col(sq)
+                board[row][col] = Piece(UI_PIECE_TYPES[engine.piece_type(code)],
+                                        UI_COLORS[engine.piece_color(code)], row, col)
         return board
 
     def draw_main_menu(self):
@@ -238,6 +277,11 @@ class ChessGame:
         return buttons
 
     def draw_board(self):
+        # Find the king to flag if the side to move is in check
+        check_square = None
+        if self.is_king_in_check(self.turn):
+            check_square = self.get_king_position(self.turn)
+        
         # Draw board squares
         for row in range(8):
             for col in range(8):
@@ -252,6 +296,12 @@ class ChessGame:
                 
                 pygame.draw.rect(self.screen, color, (x, y, SQUARE_SIZE, SQUARE_SIZE))
                 
+                # Highlight a king in check
+                if check_square == (row, col):
+                    s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+                    s.fill(CHECK_COLOR)
+                    self.screen.blit(s, (x, y))
+                
                 # Highlight selected piece
                 if self.selected_piece and self.selected_piece.row == row and self.selected_piece.col == col:
                     s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
@@ -259,18 +309,17 @@ class ChessGame:
                     self.screen.blit(s, (x, y))
                 
                 # Highlight valid moves
-                for move in self.valid_moves:
-                    if move[0] == row and move[1] == col:
-                        s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                        s.fill(MOVE_HINT_COLOR)
-                        self.screen.blit(s, (x, y))
-                        
-                        # Draw small circle for non-capture moves
-                        if not self.board[row][col]:
-                            center_x = x + SQUARE_SIZE // 2
-                            center_y = y + SQUARE_SIZE // 2
-                            radius = SQUARE_SIZE // 6
-                            pygame.draw.circle(self.screen, MOVE_HINT_COLOR[:3], (center_x, center_y), radius, 3)
+                if (row, col) in self.valid_moves:
+                    s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+                    s.fill(MOVE_HINT_COLOR)
+                    self.screen.blit(s, (x, y))
+                    
+                    # Draw small circle for non-capture moves
+                    if not self.board[row][col]:
+                        center_x = x + SQUARE_SIZE // 2
+                        center_y = y + SQUARE_SIZE // 2
+                        radius = SQUARE_SIZE // 6
+                        pygame.draw.circle(self.screen, MOVE_HINT_COLOR[:3], (center_x, center_y), radius, 3)
 
     def draw_pieces(self):
         for row in range(8):
@@ -385,359 +434,158 @@ class ChessGame:
         return None
 
     def get_valid_moves(self, piece):
-        moves = []
-        
-        if piece.type == PieceType.PAWN:
-            moves.extend(self.get_pawn_moves(piece))
-        elif piece.type == PieceType.ROOK:
-            moves.extend(self.get_rook_moves(piece))
-        elif piece.type == PieceType.KNIGHT:
-            moves.extend(self.get_knight_moves(piece))
-        elif piece.type == PieceType.BISHOP:
-            moves.extend(self.get_bishop_moves(piece))
-        elif piece.type == PieceType.QUEEN:
-            moves.extend(self.get_queen_moves(piece))
-        elif piece.type == PieceType.KING:
-            moves.extend(self.get_king_moves(piece))
-        
-        # Filter moves that would put own king in check
-        valid_moves = []
-        for move in moves:
-            if not self.move_puts_king_in_check(piece, move[0], move[1]):
-                valid_moves.append(move)
-        
-        return valid_moves
-
-    def get_pawn_moves(self, piece):
-        moves = []
-        direction = -1 if piece.color == PieceColor.WHITE else 1  # White moves up, black moves down
-        
-        # Forward move
-        new_row = piece.row + direction
-        if 0 <= new_row < 8 and self.board[new_row][piece.col] is None:
-            moves.append((new_row, piece.col))
-            
-            # Double move from starting position
-            if ((piece.color == PieceColor.WHITE and piece.row == 6) or 
-                (piece.color == PieceColor.BLACK and piece.row == 1)):
-                two_rows_ahead = piece.row + 2 * direction
-                if self.board[two_rows_ahead][piece.col] is None:
-                    moves.append((two_rows_ahead, piece.col))
-        
-        # Captures
-        capture_cols = [piece.col - 1, piece.col + 1]
-        for col in capture_cols:
-            if 0 <= col < 8:
-                new_row = piece.row + direction
-                if 0 <= new_row < 8:
-                    target = self.board[new_row][col]
-                    if target and target.color != piece.color:
-                        moves.append((new_row, col))
-        
-        # En passant
-        if self.en_passant_target:
-            ep_row, ep_col = self.en_passant_target
-            if piece.row == ep_row and abs(piece.col - ep_col) == 1:
-                # Determine capture position
-                capture_row = piece.row + direction
-                if capture_row == ep_row - direction:  # Only valid if pawn is in the right position
-                    moves.append((capture_row, ep_col))
-        
-        return moves
-
-    def get_rook_moves(self, piece):
-        moves = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # Right, Left, Down, Up
-        
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row = piece.row + i * dr
-                new_col = piece.col + i * dc
-                
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                
-                target = self.board[new_row][new_col]
-                if target is None:
-                    moves.append((new_row, new_col))
-                elif target.color != piece.color:
-                    moves.append((new_row, new_col))
-                    break
-                else:
-                    break
-        
-        return moves
+        # Only the side to move has legal moves
+        if ENGINE_COLORS[piece.color] != self.engine_board.side:
+            return set()
+        
+        # The game caches each position's legal moves by source square, so
+        # reselecting a piece costs no generation. Promotions to different
+        # pieces share a destination and collapse in the set.
+        return {(engine.square_row(to), engine.square_col(to))
+                for to in map(move_to, self.get_engine_moves(piece))}
 
-    def get_knight_moves(self, piece):
-        moves = []
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        
-        for dr, dc in knight_moves:
-            new_row = piece.row + dr
-            new_col = piece.col + dc
-            
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                target = self.board[new_row][new_col]
-                if target is None or target.color != piece.color:
-                    moves.append((new_row, new_col))
-        
-        return moves
+    def get_engine_moves(self, piece):
+        # Packed legal moves for the piece
+        return self.game.legal_moves_from(engine.square(piece.row, piece.col))
 
-    def get_bishop_moves(self, piece):
-        moves = []
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]  # Diagonals
-        
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row = piece.row + i * dr
-                new_col = piece.col + i * dc
-                
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                
-                target = self.board[new_row][new_col]
-                if target is None:
-                    moves.append((new_row, new_col))
-                elif target.color != piece.color:
-                    moves.append((new_row, new_col))
-                    break
-                else:
-                    break
-        
-        return moves
+    def engine_move(self, piece, dest_row, dest_col, promotion=PieceType.QUEEN):
+        # Find the packed move matching a board move
+        return self.game.find_move(engine.square(piece.row, piece.col), engine.square(dest_row, dest_col),
+                                   ENGINE_PIECE_TYPES[promotion])
 
-    def get_queen_moves(self, piece):
-        # Queen moves are combination of rook and bishop moves
-        return self.get_rook_moves(piece) + self.get_bishop_moves(piece)
+    def get_king_position(self, color):
+        sq = self.engine_board.king_square(ENGINE_COLORS[color])
+        if sq is None:
+            return None
+        return engine.square_row(sq), engine.square_col(sq)
 
-    def get_king_moves(self, piece):
-        moves = []
-        king_moves = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1),           (0, 1),
-            (1, -1),  (1, 0),  (1, 1)
-        ]
-        
-        for dr, dc in king_moves:
-            new_row = piece.row + dr
-            new_col = piece.col + dc
-            
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                target = self.board[new_row][new_col]
-                if target is None or target.color != piece.color:
-                    moves.append((new_row, new_col))
-        
-        # Castling moves
-        if not piece.has_moved:
-            # Kingside castling
-            if piece.color == PieceColor.WHITE:
-                if (not self.white_king_moved and not self.white_rook_h_moved and
-                    self.board[7][5] is None and self.board[7][6] is None and
-                    self.board[7][7] and self.board[7][7].type == PieceType.ROOK and self.board[7][7].color == PieceColor.WHITE):
-                    moves.append((7, 6))  # Kingside castle destination
-                    
-                # Queenside castling
-                if (not self.white_king_moved and not self.white_rook_a_moved and
-                    self.board[7][1] is None and self.board[7][2] is None and self.board[7][3] is None and
-                    self.board[7][0] and self.board[7][0].type == PieceType.ROOK and self.board[7][0].color == PieceColor.WHITE):
-                    moves.append((7, 2))  # Queenside castle destination
-            else:  # Black
-                if (not self.black_king_moved and not self.black_rook_h_moved and
-                    self.board[0][5] is None and self.board[0][6] is None and
-                    self.board[0][7] and self.board[0][7].type == PieceType.ROOK and self.board[0][7].color == PieceColor.BLACK):
-                    moves.append((0, 6))  # Kingside castle destination
-                    
-                # Queenside castling
-                if (not self.black_king_moved and not self.black_rook_a_moved and
-                    self.board[0][1] is None and self.board[0][2] is None and self.board[0][3] is None and
-                    self.board[0][0] and self.board[0][0].type == PieceType.ROOK and self.board[0][0].color == PieceColor.BLACK):
-                    moves.append((0, 2))  # Queenside castle destination
-        
-        return moves
+    def is_king_in_check(self, color):
+        return self.engine_board.in_check(ENGINE_COLORS[color])
 
-    def move_puts_king_in_check(self, piece, dest_row, dest_col):
-        # Make temporary move
-        original_piece = self.board[dest_row][dest_col]
-        original_row, original_col = piece.row, piece.col
-        
-        self.board[dest_row][dest_col] = piece
-        self.board[piece.row][piece.col] = None
-        piece.row, piece.col = dest_row, dest_col
+    def make_move(self, piece, dest_row, dest_col, promotion=PieceType.QUEEN):
+        move = self.engine_move(piece, dest_row, dest_col, promotion)
+        if move is None:
+            return
+        
+        # The engine handles castling, en passant, promotion and turn order;
+        # the Piece view is rebuilt from it afterwards
+        from_pos = (piece.row, piece.col)
+        captured_piece = self.board[dest_row][dest_col]
+        self.game.make_move(move)
+        self.board = self.create_board_view()
         
-        # Check if king is in check after move
-        in_check = self.is_king_in_check(piece.color)
+        # Add to move history
+        self.move_history.append({
+            'piece': piece,
+            'from': from_pos,
+            'to': (dest_row, dest_col),
+            'captured': captured_piece,
+            'move': move
+        })
         
-        # Undo move
-        self.board[original_row][original_col] = piece
-        self.board[dest_row][dest_col] = original_piece
-        piece.row, piece.col = original_row, original_col
+        # Clear selection
+        self.selected_piece = None
+        self.valid_moves = set()
         
-        return in_check
+        self.check_game_over()
 
-    def is_king_in_check(self, color):
-        # Find the king
-        king_pos = None
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.type == PieceType.KING and piece.color == color:
-                    king_pos = (row, col)
-                    break
-            if king_pos:
-                break
+    def check_game_over(self):
+        # Mate, stalemate, the fifty-move rule and threefold repetition all
+        # end the game; only mate has a winner
+        self.result = self.game.status()
+        if self.result == ONGOING:
+            return
+        self.game_over = True
+        if self.result == CHECKMATE:
+            self.winner = UI_COLORS[self.game.side_to_move ^ 1]
+        self.game_state = GameState.GAME_OVER
+
+    def draw_game_over(self):
+        # Semi-transparent overlay over the final position
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill(PAUSE_BG)
+        self.screen.blit(overlay, (0, 0))
         
-        if not king_pos:
-            return False
+        # Result box
+        box_width = 460
+        box_height = 300
+        box_x = SCREEN_WIDTH // 2 - box_width // 2
+        box_y = SCREEN_HEIGHT // 2 - box_height // 2
         
-        # Check if any opponent piece can attack the king
-        opponent_color = PieceColor.BLACK if color == PieceColor.WHITE else PieceColor.WHITE
+        pygame.draw.rect(self.screen, WHITE, (box_x, box_y, box_width, box_height), border_radius=15)
+        pygame.draw.rect(self.screen, BUTTON_COLOR, (box_x, box_y, box_width, box_height), 3, border_radius=15)
         
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.color == opponent_color:
-                    # Temporarily modify piece position to see if it can attack the king
-                    original_row, original_col = piece.row, piece.col
-                    piece.row, piece.col = row, col
-                    moves = self.get_valid_moves_for_opponent(piece)
-                    piece.row, piece.col = original_row, original_col
-                    
-                    if king_pos in moves:
-                        return True
-        
-        return False
-    
-    def get_valid_moves_for_opponent(self, piece):
-        # Simplified version for checking if opponent can attack
-        moves = []
-        
-        if piece.type == PieceType.PAWN:
-            direction = 1 if piece.color == PieceColor.WHITE else -1  # Reverse direction for checking attacks
-            # Pawn captures
-            for dc in [-1, 1]:
-                new_row = piece.row + direction
-                new_col = piece.col + dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    moves.append((new_row, new_col))
-        elif piece.type == PieceType.ROOK:
-            moves.extend(self.get_rook_moves(piece))
-        elif piece.type == PieceType.KNIGHT:
-            moves.extend(self.get_knight_moves(piece))
-        elif piece.type == PieceType.BISHOP:
-            moves.extend(self.get_bishop_moves(piece))
-        elif piece.type == PieceType.QUEEN:
-            moves.extend(self.get_queen_moves(piece))
-        elif piece.type == PieceType.KING:
-            moves.extend(self.get_king_moves(piece)[0:8])  # Only regular king moves, not castling
-        
-        return moves
-
-    def make_move(self, piece, dest_row, dest_col):
-        # Handle special moves
-        if piece.type == PieceType.KING:
-            # Check for castling
-            if abs(dest_col - piece.col) == 2:  # Castling move
-                # Kingside castling
-                if dest_col > piece.col:
-                    rook_start_col = 7
-                    rook_dest_col = dest_col - 1
-                # Queenside castling
-                else:
-                    rook_start_col = 0
-                    rook_dest_col = dest_col + 1
-                
-                # Move the rook
-                rook = self.board[piece.row][rook_start_col]
-                self.board[piece.row][rook_dest_col] = rook
-                self.board[piece.row][rook_start_col] = None
-                rook.col = rook_dest_col
-                rook.has_moved = True
-        
-        # Handle en passant capture
-        if (piece.type == PieceType.PAWN and 
-            self.en_passant_target and 
-            dest_row == self.en_passant_target[0] and 
-            dest_col == self.en_passant_target[1]):
-            # Remove the captured pawn
-            captured_row = piece.row  # The pawn that was passed
-            self.board[captured_row][dest_col] = None
-        
-        # Record move for en passant possibility check
-        if (piece.type == PieceType.PAWN and 
-            abs(dest_row - piece.row) == 2):  # Double pawn move
-            self.en_passant_target = ((dest_row + piece.row) // 2, dest_col)
+        # Title and outcome
+        title = self.title_font.render(RESULT_TEXT.get(self.result, "Game Over"), True, TEXT_COLOR)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH//2, box_y + 60))
+        self.screen.blit(title, title_rect)
+        
+        if self.winner is not None:
+            outcome = f"{'White' if self.winner == PieceColor.WHITE else 'Black'} wins"
         else:
-            self.en_passant_target = None
+            outcome = "Draw"
+        outcome_surface = self.small_font.render(outcome, True, TEXT_COLOR)
+        outcome_rect = outcome_surface.get_rect(center=(SCREEN_WIDTH//2, box_y + 115))
+        self.screen.blit(outcome_surface, outcome_rect)
         
-        # Capture piece if exists
-        captured_piece = self.board[dest_row][dest_col]
+        buttons = {}
         
-        # Move the piece
-        self.board[dest_row][dest_col] = piece
-        self.board[piece.row][piece.col] = None
-        piece.row = dest_row
-        piece.col = dest_col
-        piece.has_moved = True
-        
-        # Update castling rights
-        if piece.type == PieceType.KING:
-            if piece.color == PieceColor.WHITE:
-                self.white_king_moved = True
-            else:
-                self.black_king_moved = True
-        elif piece.type == PieceType.ROOK:
-            if piece.color == PieceColor.WHITE:
-                if piece.col == 0:
-                    self.white_rook_a_moved = True
-                elif piece.col == 7:
-                    self.white_rook_h_moved = True
-            else:
-                if piece.col == 0:
-                    self.black_rook_a_moved = True
-                elif piece.col == 7:
-                    self.black_rook_h_moved = True
-        
-        # Handle pawn promotion
-        if piece.type == PieceType.PAWN:
-            if (piece.color == PieceColor.WHITE and piece.row == 0) or \
-               (piece.color == PieceColor.BLACK and piece.row == 7):
-                self.board[dest_row][dest_col] = Piece(PieceType.QUEEN, piece.color, dest_row, dest_col)
-        
-        # Switch turn
-        self.turn = PieceColor.BLACK if self.turn == PieceColor.WHITE else PieceColor.WHITE
+        # Main menu button
+        button_width = 220
+        button_height = 50
+        button_x = box_x + (box_width - button_width)//2
+        menu_button_y = box_y + 200
         
-        # Add to move history
-        self.move_history.append({
-            'piece': piece,
-            'from': (piece.row, piece.col),
-            'to': (dest_row, dest_col),
-            'captured': captured_piece
-        })
+        mouse_pos = pygame.mouse.get_pos()
+        button_hover = (button_x <= mouse_pos[0] <= button_x + button_width and 
+                       menu_button_y <= mouse_pos[1] <= menu_button_y + button_height)
         
-        # Clear selection
-        self.selected_piece = None
-        self.valid_moves = []
-
-    def ai_make_move(self):
-        # Simple AI that picks a random valid move
-        possible_moves = []
+        button_color = BUTTON_HOVER_COLOR if button_hover else BUTTON_COLOR
+        pygame.draw.rect(self.screen, button_color, 
+                        (button_x, menu_button_y, button_width, button_height), border_radius=8)
         
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.color == self.turn:  # AI's color
-                    moves = self.get_valid_moves(piece)
-                    for move in moves:
-                        possible_moves.append((piece, move[0], move[1]))
+        menu_text = self.button_font.render("Main Menu", True, WHITE)
+        menu_rect = menu_text.get_rect(center=(SCREEN_WIDTH//2, menu_button_y + button_height//2))
+        self.screen.blit(menu_text, menu_rect)
+        
+        buttons["menu"] = pygame.Rect(button_x, menu_button_y, button_width, button_height)
         
-        if possible_moves:
-            # For now, pick a random move - in a real implementation, 
-            # we'd use minimax or similar algorithm based on difficulty
-            piece, dest_row, dest_col = random.choice(possible_moves)
-            self.make_move(piece, dest_row, dest_col)
+        return buttons
+
+    def update_ai(self):
+        # Called every frame while playing: starts the computer's search on
+        # its turn, and plays the move once the search has finished
+        if self.game_over or self.turn == self.player_color:
+            return
+        if self.ai_thread is None:
+            self.ai_stop = threading.Event()
+            self.ai_result = []
+            self.ai_thread = threading.Thread(target=self.ai_think, daemon=True,
+                                              args=(self.selected_difficulty, self.ai_stop, self.ai_result))
+            self.ai_thread.start()
+        elif not self.ai_thread.is_alive():
+            self.ai_thread = None
+            self.ai_make_move(self.ai_result[0])
+
+    def ai_think(self, difficulty, stop, result):
+        # Runs in the worker thread; the position is not changed meanwhile,
+        # as the player can't move until the computer has
+        result.append(self.game.choose_move(difficulty, stop))
+
+    def stop_ai(self):
+        # Abandons a search still running, when leaving or restarting a game
+        if self.ai_thread is not None:
+            self.ai_stop.set()
+            self.ai_thread.join()
+            self.ai_thread = None
+
+    def ai_make_move(self, move):
+        # Play the engine's move through the UI path
+        if move is not None:
+            frm, to = move_from(move), move_to(move)
+            piece = self.board[engine.square_row(frm)][engine.square_col(frm)]
+            promotion = UI_PIECE_TYPES[promotion_type(move)] if is_promotion(move) else PieceType.QUEEN
+            self.make_move(piece, engine.square_row(to), engine.square_col(to), promotion)
 
     def run(self):
         running = True
@@ -773,10 +621,7 @@ class ChessGame:
                         # Handle start button
                         if buttons["start"].collidepoint(event.pos):
                             self.game_state = GameState.PLAYING
-                            self.board = self.create_initial_board()
-                            self.turn = PieceColor.WHITE
-                            self.selected_piece = None
-                            self.valid_moves = []
+                            self.new_game()
                 
                 elif self.game_state == GameState.PLAYING:
                     if event.type == pygame.MOUSEBUTTONDOWN:
@@ -787,7 +632,7 @@ class ChessGame:
                         
                         # Handle board clicks
                         square = self.get_square_from_mouse(event.pos)
-                        if square:
+                        if square and self.turn == self.player_color:
                             row, col = square
                             clicked_piece = self.board[row][col]
                             
@@ -795,15 +640,13 @@ class ChessGame:
                             if self.selected_piece:
                                 # Check if clicking on a valid move
                                 if (row, col) in self.valid_moves:
+                                    # The computer replies from update_ai,
+                                    # after this move has been drawn
                                     self.make_move(self.selected_piece, row, col)
-                                    
-                                    # If it's now AI's turn, make AI move
-                                    if self.turn != self.player_color and not self.game_over:
-                                        self.ai_make_move()
                                 
                                 # Deselect if clicking elsewhere
                                 self.selected_piece = None
-                                self.valid_moves = []
+                                self.valid_moves = set()
                             
                             # Select a piece if it belongs to current player
                             elif clicked_piece and clicked_piece.color == self.turn:
@@ -817,9 +660,20 @@ class ChessGame:
                         if buttons["resume"].collidepoint(event.pos):
                             self.game_state = GameState.PLAYING
                         elif buttons["quit"].collidepoint(event.pos):
+                            self.stop_ai()
                             self.game_state = GameState.MENU
                             self.selected_piece = None
-                            self.valid_moves = []
+                            self.valid_moves = set()
+                
+                elif self.game_state == GameState.GAME_OVER:
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        buttons = self.draw_game_over()
+                        
+                        if buttons["menu"].collidepoint(event.pos):
+                            self.game_state = GameState.MENU
+            
+            if self.game_state == GameState.PLAYING:
+                self.update_ai()
             
             # Drawing
             if self.game_state == GameState.MENU:
@@ -838,10 +692,17 @@ class ChessGame:
                     self.draw_pieces()
                     self.draw_game_ui()
                 self.draw_pause_menu()
+            elif self.game_state == GameState.GAME_OVER:
+                self.screen.fill(WHITE)
+                self.draw_board()
+                self.draw_pieces()
+                self.draw_game_ui()
+                self.draw_game_over()
             
             pygame.display.flip()
             self.clock.tick(60)
         
+        self.stop_ai()
         pygame.quit()
         sys.exit()
 
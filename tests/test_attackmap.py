@@ -0,0 +1,41 @@
+# The incrementally kept attack maps must always equal maps built from
+# scratch for the same position.
+
+import random
+
+import pytest
+
+from chess_engine.attackmap import AttackMapBoard
+from chess_engine.board import Board
+from chess_engine.movegen import legal_moves
+from chess_engine.perft import REFERENCE_POSITIONS
+from chess_engine.pieces import WHITE, BLACK
+
+
+def assert_maps_match(board):
+    fresh = AttackMapBoard.from_position(board.snapshot())
+    plain = Board.from_position(board.snapshot())
+    for color in (WHITE, BLACK):
+        assert board.attack_counts[color] == fresh.attack_counts[color]
+        assert board.attacked[color] == fresh.attacked[color]
+        assert board.attacked[color] == plain.attacks_by(color)
+
+
+@pytest.mark.parametrize("name, fen", [(p[0], p[1]) for p in REFERENCE_POSITIONS],
+                         ids=[p[0] for p in REFERENCE_POSITIONS])
+def test_attack_maps_after_random_make_unmake(name, fen):
+    rng = random.Random(name)
+    board = AttackMapBoard.from_fen(fen)
+    assert_maps_match(board)
+    for _ in range(200):
+        moves = legal_moves(board)
+        # Walk forward mostly, back now and then, so unmake is exercised
+        # in the middle of a game as well as on the way home
+        if moves and (not board.undo_stack or rng.random() < 0.7):
+            board.make_move(rng.choice(moves))
+        else:
+            board.unmake_move()
+        assert_maps_match(board)
+    while board.undo_stack:
+        board.unmake_move()
+        assert_maps_match(board)
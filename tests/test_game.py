@@ -0,0 +1,57 @@
+# Game endings as reported by game_status.
+
+from chess_engine.board import Board, START_FEN
+from chess_engine.game import Game, ONGOING, CHECKMATE, STALEMATE, FIFTY_MOVES, REPETITION, game_status
+from chess_engine.pieces import WHITE, parse_square
+
+
+def play(game, *moves):
+    for uci in moves:
+        move = game.find_move(parse_square(uci[:2]), parse_square(uci[2:4]))
+        assert move is not None, uci
+        game.make_move(move)
+
+
+def test_start_position_is_ongoing():
+    assert game_status(Board.from_fen(START_FEN)) == ONGOING
+
+
+def test_threefold_repetition_by_knight_shuffle():
+    game = Game()
+    shuffle = ("g1f3", "g8f6", "f3g1", "f6g8")
+    play(game, *shuffle)
+    # The start position has now occurred twice
+    assert game.status() == ONGOING
+    play(game, *shuffle)
+    assert game.status() == REPETITION
+    assert game.is_game_over()
+    assert game.winner() is None
+
+
+def test_repetition_count_resets_after_pawn_move():
+    game = Game()
+    play(game, "g1f3", "g8f6", "f3g1", "f6g8", "e2e4", "e7e5")
+    play(game, "g1f3", "g8f6", "f3g1", "f6g8")
+    assert game.status() == ONGOING
+
+
+def test_fifty_move_rule():
+    game = Game(Board.from_fen("7k/8/6K1/8/8/8/8/R7 w - - 99 80"))
+    assert game.status() == ONGOING
+    play(game, "a1a2")
+    assert game.board.halfmove == 100
+    assert game.status() == FIFTY_MOVES
+    assert game.winner() is None
+
+
+def test_mate_on_hundredth_half_move_is_mate():
+    game = Game(Board.from_fen("7k/8/6K1/8/8/8/8/R7 w - - 99 80"))
+    play(game, "a1a8")
+    assert game.board.halfmove == 100
+    assert game.status() == CHECKMATE
+    assert game.winner() == WHITE
+
+
+def test_stalemate():
+    board = Board.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+    assert game_status(board) == STALEMATE
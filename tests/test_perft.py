@@ -0,0 +1,36 @@
+# Perft against the published node counts: the regression guard for move
+# generation and make/unmake. Depths stay at 3 or below so the suite runs in
+# about a second; deeper runs are for python -m chess_engine.
+
+import pytest
+
+from chess_engine.board import Board
+from chess_engine.perft import REFERENCE_POSITIONS, perft, divide
+
+CASES = [(name, fen, depth, counts[depth - 1])
+         for name, fen, counts in REFERENCE_POSITIONS
+         for depth in (1, 2, 3)]
+
+
+@pytest.mark.parametrize("name, fen, depth, expected", CASES,
+                         ids=[f"{case[0]}-{case[2]}" for case in CASES])
+def test_perft(name, fen, depth, expected):
+    assert perft(Board.from_fen(fen), depth) == expected
+
+
+@pytest.mark.parametrize("name, fen, counts", REFERENCE_POSITIONS,
+                         ids=[position[0] for position in REFERENCE_POSITIONS])
+def test_divide_sums_to_perft(name, fen, counts):
+    moves = divide(Board.from_fen(fen), 2)
+    assert len(moves) == counts[0]
+    assert sum(moves.values()) == counts[1]
+
+
+def test_perft_restores_board():
+    board = Board.from_fen(REFERENCE_POSITIONS[1][1])
+    key = board.key
+    squares = board.squares[:]
+    perft(board, 3)
+    assert board.key == key
+    assert board.squares == squares
+    assert not board.undo_stack
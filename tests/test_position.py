@@ -0,0 +1,72 @@
+# Position snapshots must bring back exactly the board they were taken from.
+
+import pickle
+
+import pytest
+
+from chess_engine.board import Board, START_FEN, WHITE_KINGSIDE, BLACK_QUEENSIDE
+from chess_engine.movegen import legal_moves
+from chess_engine.moves import move_to_uci
+from chess_engine.perft import REFERENCE_POSITIONS
+from chess_engine.pieces import BLACK, parse_square
+from chess_engine.position import Position
+
+
+def board_move(board, uci):
+    return next(move for move in legal_moves(board) if move_to_uci(move) == uci)
+
+
+def round_trip(board):
+    data = board.snapshot().to_bytes()
+    return Board.from_position(Position.from_bytes(data))
+
+
+def assert_same_board(board, restored):
+    assert restored.squares == board.squares
+    assert restored.pieces == board.pieces
+    assert restored.side == board.side
+    assert restored.castling == board.castling
+    assert restored.ep_square == board.ep_square
+    assert restored.halfmove == board.halfmove
+    assert restored.fullmove == board.fullmove
+    assert restored.key == board.key
+    assert restored.key == restored.compute_key()
+
+
+@pytest.mark.parametrize("fen", [START_FEN] + [p[1] for p in REFERENCE_POSITIONS])
+def test_round_trip(fen):
+    board = Board.from_fen(fen)
+    assert_same_board(board, round_trip(board))
+
+
+def test_halfmove_clock_above_255():
+    board = Board.from_fen("8/8/8/4k3/8/8/8/4K2R w K - 300 400")
+    restored = round_trip(board)
+    assert restored.halfmove == 300
+    assert restored.fullmove == 400
+
+
+def test_en_passant_and_castling():
+    board = Board.from_fen("r3k2r/8/8/8/3p4/8/4P3/R3K2R w Kq - 0 1")
+    board.make_move(board_move(board, "e2e4"))
+    assert board.ep_square == parse_square("e3")
+    assert board.castling == WHITE_KINGSIDE | BLACK_QUEENSIDE
+    restored = round_trip(board)
+    assert_same_board(board, restored)
+    assert restored.side == BLACK
+
+
+def test_pickle_and_value_semantics():
+    board = Board.from_fen(REFERENCE_POSITIONS[1][1])
+    position = board.snapshot()
+    copy = pickle.loads(pickle.dumps(position))
+    assert copy == position
+    assert hash(copy) == hash(position)
+    assert_same_board(board, Board.from_position(copy))
+    with pytest.raises(AttributeError):
+        position.side = BLACK
+
+
+def test_wrong_length_is_rejected():
+    with pytest.raises(ValueError):
+        Position.from_bytes(bytes(10))